@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# ASGI 에서는 동기 뷰가 요청마다 새 스레드에서 돌아 스레드별 지속 연결을 다시 쓰지 못하고 쌓이기만 하므로
+# 요청이 끝나면 연결을 닫습니다. (settings.DB_CONN_MAX_AGE 참고)
+os.environ.setdefault('DJANGO_DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
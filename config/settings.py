@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -59,23 +60,66 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # 데이터베이스
+# 원격 MySQL 이므로 요청/태스크마다 새로 연결하지 않고 워커(스레드)별 연결을 DJANGO_DB_CONN_MAX_AGE 초 동안
+# 재사용합니다. Celery 워커도 태스크 전후에 같은 기준(close_if_unusable_or_obsolete)으로 연결을 정리합니다.
+# 재사용하는 연결은 CONN_HEALTH_CHECKS 로 요청/태스크 시작 후 첫 쿼리 전에 살아 있는지 확인합니다.
+# 지속 연결은 WSGI(runserver, gunicorn)와 Celery 워커에만 씁니다. uvicorn(config.asgi)은 동기 뷰를 요청마다
+# 새 스레드에서 실행해 연결이 재사용되지 않고 max_connections 까지 쌓이므로, config/asgi.py 가 기본값을 0 으로
+# 바꿉니다. ASGI 에서 연결 비용을 줄이려면 Django 쪽은 0 으로 두고 ProxySQL 같은 커넥션 풀러를 앞에 둡니다.
+DB_CONN_MAX_AGE = int(os.getenv('DJANGO_DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = os.getenv('DJANGO_DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'laundry_db',
-        'USER': 'dorm_user',
-        'PASSWORD': '1234',
-        'HOST': '52.78.47.153',
-        'PORT': '3306',
+        'NAME': os.getenv('DJANGO_DB_NAME', 'laundry_db'),
+        'USER': os.getenv('DJANGO_DB_USER', 'dorm_user'),
+        'PASSWORD': os.getenv('DJANGO_DB_PASSWORD', '1234'),
+        'HOST': os.getenv('DJANGO_DB_HOST', '52.78.47.153'),
+        'PORT': os.getenv('DJANGO_DB_PORT', '3306'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'auth_plugin': 'mysql_native_password',
             'charset': 'utf8mb4',
             'use_unicode': True,
+            'connect_timeout': int(os.getenv('DJANGO_DB_CONNECT_TIMEOUT', 5)),
         },
     }
 }
 
+# 읽기 전용 복제본: DJANGO_DB_REPLICA_HOST 가 있으면 기기 목록처럼 읽기가 많은 화면만 복제본에서 읽음
+# (laundry.db_router 참고). 계정/포트가 다르면 DJANGO_DB_REPLICA_* 로 덮어씀
+if os.getenv('DJANGO_DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DJANGO_DB_REPLICA_HOST'),
+        'PORT': os.getenv('DJANGO_DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.getenv('DJANGO_DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DJANGO_DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# 로컬 개발/벤치마크용: DJANGO_DB_ENGINE=sqlite 이면 원격 MySQL 대신 SQLite 파일 사용
+if os.getenv('DJANGO_DB_ENGINE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DJANGO_SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            # 동시 쓰기가 바로 'database is locked' 로 실패하지 않도록 쓰기 잠금을 먼저 잡고 대기
+            'OPTIONS': {
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': 'PRAGMA journal_mode=WAL;',
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ['laundry.db_router.ReplicaRouter']
+
 # 비밀번호 검증
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -111,6 +155,7 @@ LOGOUT_REDIRECT_URL = '/laundry/login/'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'laundry.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -124,6 +169,114 @@ CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localho
 
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+
+# 예약 스케줄러: 예약별 ETA 태스크 대신 beat 가 주기적으로 시작/종료/알림 대상을 처리
+RESERVATION_SWEEP_INTERVAL = int(os.environ.get('RESERVATION_SWEEP_INTERVAL', 15))
+RESERVATION_SWEEP_BATCH = int(os.environ.get('RESERVATION_SWEEP_BATCH', 500))
+# 대기열 승격: 승격 예약 길이와, 사용자가 확인하지 않으면 다음 대기자로 넘어가는 기한
+PROMOTION_DURATION = timedelta(minutes=int(os.environ.get('PROMOTION_DURATION_MINUTES', 60)))
+PROMOTION_CLAIM_WINDOW = timedelta(minutes=int(os.environ.get('PROMOTION_CLAIM_WINDOW_MINUTES', 10)))
+# 슬롯 그리드 예약: 슬롯 길이(분), 예약 화면에서 기본으로 잡는 슬롯 수, 한 번에 예약할 수 있는 최대 슬롯 수
+SLOT_MINUTES = int(os.environ.get('SLOT_MINUTES', 10))
+BOOKING_DEFAULT_SLOTS = int(os.environ.get('BOOKING_DEFAULT_SLOTS', 4))
+BOOKING_MAX_SLOTS = int(os.environ.get('BOOKING_MAX_SLOTS', 18))
+# 예약할 수 있는 가장 먼 시점 (지금부터), 슬롯 그리드도 이 기간 안의 날짜만 보여줌
+BOOKING_HORIZON = timedelta(days=int(os.environ.get('BOOKING_HORIZON_DAYS', 14)))
+# 기기 사용 여부(is_in_use) 플래그를 진행 중 예약에 맞추는 주기(초)
+MACHINE_RECONCILE_INTERVAL = int(os.environ.get('MACHINE_RECONCILE_INTERVAL', 60))
+# 예약 보관: 사용 완료/취소 후 이 기간이 지난 예약을 보관 테이블로 옮김 (한 트랜잭션에 CHUNK 건씩)
+RESERVATION_ARCHIVE_AFTER = timedelta(days=int(os.environ.get('RESERVATION_ARCHIVE_AFTER_DAYS', 30)))
+RESERVATION_ARCHIVE_CHUNK = int(os.environ.get('RESERVATION_ARCHIVE_CHUNK', 500))
+RESERVATION_ARCHIVE_INTERVAL = int(os.environ.get('RESERVATION_ARCHIVE_INTERVAL', 3600))
+# 사용 통계 증분 집계: 주기(초), 한 트랜잭션에서 반영할 기록 수,
+# 아직 커밋되지 않은 기록을 건너뛰지 않도록 최근 USAGE_ROLLUP_LAG 초 안의 기록은 다음 주기로 미룸
+USAGE_ROLLUP_INTERVAL = int(os.environ.get('USAGE_ROLLUP_INTERVAL', 300))
+USAGE_ROLLUP_BATCH = int(os.environ.get('USAGE_ROLLUP_BATCH', 5000))
+USAGE_ROLLUP_LAG = int(os.environ.get('USAGE_ROLLUP_LAG', 60))
+# 사용 시간 분포 버킷 폭(분)
+USAGE_DURATION_BUCKET = int(os.environ.get('USAGE_DURATION_BUCKET', 5))
+# 이용 분석 결과 캐시(초): 집계가 끝날 때마다 무효화되며, 이 값은 집계가 멈췄을 때의 상한
+ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 3600))
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'sweep-reservations': {
+        'task': 'laundry.task.sweep_reservations',
+        'schedule': RESERVATION_SWEEP_INTERVAL,
+    },
+    'rollup-usage': {
+        'task': 'laundry.task.rollup_usage',
+        'schedule': USAGE_ROLLUP_INTERVAL,
+    },
+    'reconcile-machine-occupancy': {
+        'task': 'laundry.task.reconcile_machine_occupancy',
+        'schedule': MACHINE_RECONCILE_INTERVAL,
+    },
+    'archive-reservations': {
+        'task': 'laundry.task.archive_reservations',
+        'schedule': RESERVATION_ARCHIVE_INTERVAL,
+    },
+}
+
+# 캐시 (Celery 와 같은 Redis 인스턴스 사용, 오프라인/테스트 환경에서는 DJANGO_CACHE_BACKEND=locmem)
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/1')
+if os.environ.get('DJANGO_CACHE_BACKEND') == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'laundry',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+
+# 기기 상태 캐시 TTL(초): 무효화가 누락되더라도 이 시간이 지나면 DB에서 다시 읽음
+MACHINE_CACHE_TTL = int(os.environ.get('MACHINE_CACHE_TTL', 60))
+
+# 대기열 순번 조회용 Redis sorted set, 빈 값이면 DB 인덱스로 순번을 계산
+WAITLIST_REDIS_URL = os.environ.get(
+    'WAITLIST_REDIS_URL', '' if os.environ.get('DJANGO_CACHE_BACKEND') == 'locmem' else CACHE_REDIS_URL
+)
+# 대기열 sorted set 의 TTL(초): 커밋 이후 미러 갱신이 빠져 어긋나더라도 이 시간이 지나면 DB 에서 다시 채움
+WAITLIST_MIRROR_TTL = int(os.environ.get('WAITLIST_MIRROR_TTL', 600))
+# 예상 대기 시간 계산에 쓰는 기기별 평균 사용 시간 캐시(초)
+WAITLIST_CYCLE_TTL = int(os.environ.get('WAITLIST_CYCLE_TTL', 600))
+
+# 실시간 기기 상태 이벤트(SSE) 중계용 Redis pub/sub, 빈 값이면 같은 프로세스 안에서만 전달
+MACHINE_EVENTS_REDIS_URL = os.environ.get('MACHINE_EVENTS_REDIS_URL', CELERY_BROKER_URL)
+MACHINE_EVENTS_HEARTBEAT = int(os.environ.get('MACHINE_EVENTS_HEARTBEAT', 15))
+
+# 요청/태스크 프로파일링 (laundry.profiling, 기본 꺼짐): 표본 비율, 항상 표본으로 남길 느린 요청 기준(ms),
+# 링 버퍼 크기, 누적값을 공유 캐시에 반영하는 주기(초), metrics/ 를 로그인 없이 읽을 수 있는 주소
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.01))
+PROFILING_SLOW_MS = int(os.environ.get('PROFILING_SLOW_MS', 500))
+PROFILING_BUFFER_SIZE = int(os.environ.get('PROFILING_BUFFER_SIZE', 1000))
+PROFILING_FLUSH_INTERVAL = int(os.environ.get('PROFILING_FLUSH_INTERVAL', 5))
+PROFILING_METRICS_IPS = [ip for ip in os.environ.get('PROFILING_METRICS_IPS', '127.0.0.1,::1').split(',') if ip]
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, 'laundry.profiling.ProfilingMiddleware')
+
+# API 토큰 인증 캐시(초): 프로세스 메모리 캐시는 다른 프로세스에서 폐기한 토큰이 통과할 수 있는 최대 시간
+TOKEN_AUTH_LOCAL_TTL = int(os.environ.get('TOKEN_AUTH_LOCAL_TTL', 5))
+# 공유 캐시(Redis)에는 user_id, is_active 만 둠
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300))
+
+# 사용자 일괄 등록(import_users): 한 트랜잭션에 넣을 인원, 평문 비밀번호 해시 프로세스 수(0이면 CPU 수)
+USER_IMPORT_BATCH = int(os.environ.get('USER_IMPORT_BATCH', 1000))
+USER_IMPORT_WORKERS = int(os.environ.get('USER_IMPORT_WORKERS', 0))
+
+# 웹푸시 (VAPID)
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+VAPID_PRIVATE_KEY = os.getenv('VAPID_PRIVATE_KEY', '')
+VAPID_CLAIMS_SUB = os.getenv('VAPID_CLAIMS_SUB', 'mailto:your_email@hufs.ac.kr')
+WEBPUSH_MAX_WORKERS = int(os.getenv('WEBPUSH_MAX_WORKERS', 16))
+WEBPUSH_TIMEOUT = float(os.getenv('WEBPUSH_TIMEOUT', 10))
+
 # 이메일 설정
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.your-email.com'
@@ -5,6 +5,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from laundry.models import Building, Machine
+from laundry.state import machine_set_changed
 
 # 동별 세탁기/건조기 수 정의
 buildings = {
@@ -27,10 +28,14 @@ for name, machine_counts in buildings.items():
         existing = Machine.objects.filter(building=building, machine_type=machine_type).count()
         to_create = count - existing
 
-        for i in range(existing + 1, existing + to_create + 1):
-            Machine.objects.create(
+        Machine.objects.bulk_create([
+            Machine(
                 name=f"{name} {machine_type.upper()}{i}",
                 building=building,
                 machine_type=machine_type
             )
+            for i in range(existing + 1, existing + to_create + 1)
+        ])
+        if to_create > 0:
+            machine_set_changed(building.id)
         print(f"  > {machine_type} {to_create}대 추가 완료 (총 {count}대 예상)")
\ No newline at end of file
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import User, Machine, Reservation, WaitList, Building, PushSubscription
+from .models import (
+    User, Machine, Reservation, ReservationArchive, WaitList, Building, PushSubscription, UsageHistory, ProfileSample,
+)
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -17,8 +19,15 @@ class MachineAdmin(admin.ModelAdmin):
 
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'machine', 'start_time', 'end_time')
-    list_filter = ('machine', 'start_time')
+    list_display = ('user', 'machine', 'start_time', 'end_time', 'status')
+    list_filter = ('status', 'machine', 'start_time')
+    search_fields = ('user__student_id', 'machine__name')
+
+
+@admin.register(ReservationArchive)
+class ReservationArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'machine', 'start_time', 'end_time', 'status', 'archived_at')
+    list_filter = ('status',)
     search_fields = ('user__student_id', 'machine__name')
 
 
@@ -38,3 +47,21 @@ class BuildingAdmin(admin.ModelAdmin):
 class PushSubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'endpoint', 'created_at')
     search_fields = ('user__student_id', 'endpoint')
+
+
+@admin.register(UsageHistory)
+class UsageHistoryAdmin(admin.ModelAdmin):
+    list_display = ('machine', 'user', 'start_time', 'ended_at', 'outcome')
+    list_filter = ('outcome',)
+    search_fields = ('user__student_id', 'machine__name')
+
+
+@admin.register(ProfileSample)
+class ProfileSampleAdmin(admin.ModelAdmin):
+    list_display = ('recorded_at', 'kind', 'name', 'status', 'duration_ms', 'query_count', 'db_ms', 'slowest_sql_ms')
+    list_filter = ('kind', 'name')
+    search_fields = ('name', 'detail', 'slowest_sql')
+    readonly_fields = [field.name for field in ProfileSample._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
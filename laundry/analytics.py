@@ -0,0 +1,124 @@
+# laundry/analytics.py
+"""
+동/기기 종류별 이용 분석: 요일 x 시간대(7x24) 점유율, 평균 대기 인원, 추천 방문 시각.
+
+사용 통계 집계(MachineUsageRollup, QueueLengthRollup)만 읽어 NumPy 로 한 번에 격자에 쌓고,
+결과는 다음 집계(rollup_usage)가 끝날 때까지 캐시합니다.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Machine, MachineUsageRollup, QueueLengthRollup, UsageRollupState
+from .profiling import count_cache
+
+KEY_PREFIX = 'laundry:analytics:'
+VERSION_KEY = f'{KEY_PREFIX}version'
+HOURS = 7 * 24
+
+
+def bump_version():
+    """집계가 갱신되었음을 알려 이전 분석 결과 캐시를 모두 무효화합니다."""
+    cache.set(VERSION_KEY, timezone.now().timestamp(), None)
+
+
+def observed_hours(since, now):
+    """since ~ now 사이에 각 (요일, 시간대) 칸이 몇 번 지나갔는지 7x24 배열로 셉니다."""
+    if since is None or since >= now:
+        return np.zeros((7, 24))
+    start = timezone.localtime(since).replace(minute=0, second=0, microsecond=0)
+    count = int((now - start).total_seconds() // 3600) + 1
+    cells = (start.weekday() * 24 + start.hour + np.arange(count)) % HOURS
+    return np.bincount(cells, minlength=HOURS).reshape(7, 24).astype(float)
+
+
+def _grid(building_index, rows, value_columns):
+    """(building_id, weekday, hour, *values) 행들을 동별 7x24 격자로 더합니다."""
+    grids = [np.zeros((len(building_index), 7, 24)) for _ in value_columns]
+    if not rows:
+        return grids
+    data = np.array(rows, dtype=float)
+    index = np.searchsorted(building_index, data[:, 0].astype(np.int64))
+    weekday, hour = data[:, 1].astype(np.int64), data[:, 2].astype(np.int64)
+    for grid, column in zip(grids, value_columns):
+        np.add.at(grid, (index, weekday, hour), data[:, column])
+    return grids
+
+
+def _compute(building_ids, machine_type, now):
+    building_index = np.array(sorted(building_ids), dtype=np.int64)
+    machine_counts = dict(
+        Machine.objects.filter(building_id__in=building_ids, machine_type=machine_type)
+        .order_by().values('building_id').annotate(n=Count('id')).values_list('building_id', 'n')
+    )
+    machines = np.array([machine_counts.get(int(b), 0) for b in building_index], dtype=float)
+
+    (occupied,) = _grid(building_index, list(
+        MachineUsageRollup.objects.filter(
+            machine__building_id__in=building_ids, machine__machine_type=machine_type
+        ).values_list('machine__building_id', 'weekday', 'hour', 'occupied_seconds')
+    ), [3])
+    samples, waiters = _grid(building_index, list(
+        QueueLengthRollup.objects.filter(
+            building_id__in=building_ids, machine_type=machine_type
+        ).values_list('building_id', 'weekday', 'hour', 'samples', 'waiters')
+    ), [3, 4])
+
+    state = UsageRollupState.objects.filter(name='usage').first()
+    since = state.since if state else None
+    capacity = machines[:, None, None] * 3600 * np.maximum(observed_hours(since, now), 1)
+    occupancy = np.clip(np.divide(occupied, capacity, out=np.zeros_like(occupied), where=capacity > 0), 0, 1)
+    queue = np.divide(waiters, samples, out=np.zeros_like(waiters), where=samples > 0)
+
+    # 앞으로 24시간 중 (점유율 + 기기당 대기 인원) 이 가장 낮은 시간대, 같으면 가장 이른 시간
+    local = timezone.localtime(now)
+    upcoming = (local.weekday() * 24 + local.hour + np.arange(24)) % HOURS
+    score = occupancy.reshape(len(building_index), HOURS)[:, upcoming] \
+        + queue.reshape(len(building_index), HOURS)[:, upcoming] / np.maximum(machines, 1)[:, None]
+    best = score.argmin(axis=1)
+    hour_start = local.replace(minute=0, second=0, microsecond=0)
+
+    result = {}
+    for i, building_id in enumerate(building_index.tolist()):
+        cell = upcoming[best[i]]
+        result[building_id] = {
+            'building_id': building_id,
+            'machine_type': machine_type,
+            'machine_count': int(machines[i]),
+            'observed_since': timezone.localtime(since).isoformat() if since else None,
+            'occupancy': np.round(occupancy[i], 3).tolist(),
+            'queue_length': np.round(queue[i], 2).tolist(),
+            'typical_queue_length': round(float(queue[i, local.weekday(), local.hour]), 2),
+            'best_time': {
+                'weekday': int(cell // 24),
+                'hour': int(cell % 24),
+                'starts_at': (hour_start + timedelta(hours=int(best[i]))).isoformat(),
+                'occupancy': round(float(occupancy[i].flat[cell]), 3),
+                'queue_length': round(float(queue[i].flat[cell]), 2),
+            },
+        }
+    return result
+
+
+def building_analytics(building_ids, machine_type, now=None):
+    """{building_id: 분석 결과}. 캐시에 없는 동들은 한 번에 계산합니다."""
+    now = now or timezone.now()
+    version = cache.get_or_set(VERSION_KEY, 0, None)
+    hour = timezone.localtime(now).strftime('%Y%m%d%H')
+    keys = {f'{KEY_PREFIX}{version}:{hour}:{building_id}:{machine_type}': building_id for building_id in building_ids}
+    found = cache.get_many(list(keys))
+    result = {keys[key]: value for key, value in found.items()}
+    missing = [building_id for building_id in building_ids if building_id not in result]
+    count_cache(hits=len(result), misses=len(missing))
+    if missing:
+        fresh = _compute(missing, machine_type, now)
+        cache.set_many(
+            {key: fresh[building_id] for key, building_id in keys.items() if building_id in fresh},
+            settings.ANALYTICS_CACHE_TTL,
+        )
+        result.update(fresh)
+    return result
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 class LaundryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'laundry'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import building_images, profiling
+
+        building_images.load()
+        if settings.PROFILING_ENABLED:
+            profiling.install()
@@ -0,0 +1,42 @@
+# laundry/archive.py
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Reservation, ReservationArchive
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'machine_id', 'start_time', 'end_time', 'status', 'created_at', 'closed_at', 'idempotency_key')
+
+
+def archive_closed_reservations(older_than=None, chunk_size=None, now=None):
+    """
+    사용 완료/취소된 지 older_than(기본 RESERVATION_ARCHIVE_AFTER) 이 지난 예약을
+    보관 테이블로 옮기고, 옮긴 예약 수를 반환합니다.
+
+    chunk_size 개씩 따로 커밋하므로 한 번에 잠그는 행 수와 트랜잭션 길이가 제한되고,
+    다른 작업이 잠근 행은 SKIP LOCKED 로 건너뛰어 다음 실행에서 옮깁니다.
+    """
+    now = now or timezone.now()
+    cutoff = now - (settings.RESERVATION_ARCHIVE_AFTER if older_than is None else older_than)
+    chunk_size = chunk_size or settings.RESERVATION_ARCHIVE_CHUNK
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Reservation.objects.select_for_update(skip_locked=skip_locked)
+                .filter(status__in=Reservation.CLOSED_STATUSES, closed_at__lt=cutoff)
+                .order_by('closed_at', 'id')
+                .values(*ARCHIVE_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                break
+            # 중간에 실패한 뒤 다시 실행되어도 같은 예약이 두 번 보관되지 않도록 ignore_conflicts
+            ReservationArchive.objects.bulk_create(
+                [ReservationArchive(**row) for row in rows], ignore_conflicts=True
+            )
+            Reservation.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+        if len(rows) < chunk_size:
+            break
+    return moved
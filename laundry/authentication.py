@@ -0,0 +1,108 @@
+# laundry/authentication.py
+"""
+API 클라이언트(키오스크, 모바일 앱)용 토큰 인증.
+
+"Authorization: Token <key>" 헤더의 토큰으로 사용자를 찾되, 토큰→사용자를
+프로세스 메모리(TOKEN_AUTH_LOCAL_TTL 초)에 두어 몇 초마다 폴링하는 클라이언트도
+평소에는 인증에 DB 쿼리를 쓰지 않습니다.
+
+공유 캐시(TOKEN_AUTH_CACHE_TTL 초)에는 사용자 객체(비밀번호 해시 포함)를 넣지 않고
+user_id, is_active 만 둡니다. 메모리 캐시가 만료된 프로세스는 공유 캐시로 비활성 사용자를
+DB 없이 거절하고, 그 밖에는 사용자를 pk 로 한 번 읽습니다.
+
+토큰이 삭제(api/token/revoke/, 관리 화면)되거나 사용자가 수정/비활성화되면 models.py 의 시그널이
+forget_token() 으로 공유 캐시와 이 프로세스의 메모리 캐시를 비웁니다. 다른 프로세스의 메모리 캐시는
+TOKEN_AUTH_LOCAL_TTL 초 안에 만료되므로, 폐기된 토큰은 늦어도 그 시간 뒤에는 거부됩니다.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .profiling import count_cache
+
+LOCAL_CACHE_SIZE = 10000
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def token_cache_key(key):
+    # 캐시 서버에 토큰 원문이 남지 않도록 해시로 저장
+    return 'laundry:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _local_get(key):
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        credentials, expires = entry
+        if expires <= time.monotonic():
+            del _local[key]
+            return None
+        return credentials
+
+
+def _local_set(key, credentials):
+    now = time.monotonic()
+    with _local_lock:
+        if len(_local) >= LOCAL_CACHE_SIZE:
+            for stale in [k for k, (_, expires) in _local.items() if expires <= now]:
+                del _local[stale]
+            if len(_local) >= LOCAL_CACHE_SIZE:
+                _local.clear()
+        _local[key] = (credentials, now + settings.TOKEN_AUTH_LOCAL_TTL)
+
+
+def forget_token(key):
+    """토큰 캐시를 비웁니다. 토큰 삭제, 사용자 정보 변경 시 호출"""
+    with _local_lock:
+        _local.pop(key, None)
+    cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """토큰→사용자 조회를 메모리/공유 캐시로 대신하는 TokenAuthentication"""
+
+    def authenticate_credentials(self, key):
+        credentials = _local_get(key)
+        if credentials is None:
+            credentials = self._load(key)
+            _local_set(key, credentials)
+
+        user, token = credentials
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (user, token)
+
+    def _load(self, key):
+        """(user, token). 공유 캐시에 있으면 사용자만 pk 로 읽고, 없으면 토큰과 함께 읽어 캐시에 남깁니다."""
+        model = self.get_model()
+        entry = cache.get(token_cache_key(key))
+        count_cache(hits=int(entry is not None), misses=int(entry is None))
+        if entry is not None:
+            if not entry['is_active']:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            user = get_user_model().objects.filter(pk=entry['user_id']).first()
+            if user is not None:
+                return user, model(key=key, user=user)
+            forget_token(key)
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        try:
+            token = model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        cache.set(
+            token_cache_key(key),
+            {'user_id': token.user_id, 'is_active': token.user.is_active},
+            settings.TOKEN_AUTH_CACHE_TTL,
+        )
+        return token.user, token
@@ -0,0 +1,183 @@
+# laundry/availability.py
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+from django.utils import timezone
+
+
+class MachineSchedule:
+    """
+    한 기기의 예약 구간 [start, end)를 시작 시각 순으로 정렬해 보관합니다.
+    정상적인 예약끼리는 겹치지 않으므로 종료 시각 목록도 함께 정렬되어 있고,
+    빈 구간 확인은 이웃한 두 구간만 보면 됩니다. (O(log n))
+    """
+
+    __slots__ = ('starts', 'ends', 'ids', 'by_id')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.by_id = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, reservation_id, start, end):
+        if reservation_id in self.by_id:
+            self.remove(reservation_id)
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, reservation_id)
+        self.by_id[reservation_id] = start
+
+    def remove(self, reservation_id):
+        start = self.by_id.pop(reservation_id, None)
+        if start is None:
+            return
+        i = bisect_left(self.starts, start)
+        while i < len(self.ids) and self.ids[i] != reservation_id:
+            i += 1
+        if i < len(self.ids):
+            del self.starts[i], self.ends[i], self.ids[i]
+
+    def prune(self, now):
+        """이미 끝난 구간을 앞에서부터 잘라냅니다."""
+        cut = 0
+        while cut < len(self.ends) and self.ends[cut] <= now:
+            self.by_id.pop(self.ids[cut], None)
+            cut += 1
+        if cut:
+            del self.starts[:cut], self.ends[:cut], self.ids[:cut]
+
+    def is_free(self, start, end):
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return False
+        if i < len(self.starts) and self.starts[i] < end:
+            return False
+        return True
+
+    def between(self, start, end):
+        """[start, end) 와 겹치는 구간 (시작, 끝) 을 시작 시각 순으로 돌려줍니다."""
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            i -= 1
+        while i < len(self.starts) and self.starts[i] < end:
+            yield self.starts[i], self.ends[i]
+            i += 1
+
+    def next_free(self, after, duration):
+        """after 이후로 duration 만큼 비어 있는 가장 이른 시작 시각을 반환합니다."""
+        t = after
+        i = bisect_right(self.starts, t)
+        if i > 0 and self.ends[i - 1] > t:
+            t = self.ends[i - 1]
+        while i < len(self.starts) and self.starts[i] < t + duration:
+            t = max(t, self.ends[i])
+            i += 1
+        return t
+
+
+class AvailabilityIndex:
+    """
+    기기별 MachineSchedule 을 프로세스 메모리에 유지하는 예약 가능 여부 인덱스입니다.
+    기기별 일정은 처음 조회할 때 DB에서 한 번 읽어오고, 이후에는 Reservation
+    저장/삭제 시그널로 갱신됩니다. 다른 프로세스(Celery 워커 등)에서 바뀐 내용은
+    반영되지 않을 수 있으므로 예약 확정 여부는 항상 check()로 DB와 대조합니다.
+    """
+
+    def __init__(self):
+        self._schedules = {}
+        self._lock = threading.RLock()
+
+    def _load_many(self, machine_ids):
+        from .models import Reservation
+
+        schedules = {machine_id: MachineSchedule() for machine_id in machine_ids}
+        rows = Reservation.objects.live().filter(
+            machine_id__in=machine_ids,
+            end_time__gt=timezone.now(),
+        ).values_list('machine_id', 'id', 'start_time', 'end_time')
+        for machine_id, reservation_id, start, end in rows:
+            schedules[machine_id].add(reservation_id, start, end)
+        return schedules
+
+    def _load(self, machine_id):
+        return self._load_many([machine_id])[machine_id]
+
+    def _schedule(self, machine_id):
+        schedule = self._schedules.get(machine_id)
+        if schedule is None:
+            schedule = self._schedules[machine_id] = self._load(machine_id)
+        else:
+            schedule.prune(timezone.now())
+        return schedule
+
+    def is_free(self, machine_id, start, end):
+        with self._lock:
+            return self._schedule(machine_id).is_free(start, end)
+
+    def next_free_slot(self, machine_id, duration, after=None):
+        after = max(after or timezone.now(), timezone.now())
+        with self._lock:
+            return self._schedule(machine_id).next_free(after, duration)
+
+    def add(self, reservation):
+        with self._lock:
+            schedule = self._schedules.get(reservation.machine_id)
+            if schedule is not None:
+                schedule.add(reservation.id, reservation.start_time, reservation.end_time)
+
+    def discard(self, reservation_id, machine_id):
+        with self._lock:
+            schedule = self._schedules.get(machine_id)
+            if schedule is not None:
+                schedule.remove(reservation_id)
+
+    def reload(self, machine_id):
+        with self._lock:
+            self._schedules[machine_id] = self._load(machine_id)
+
+    def reload_many(self, machine_ids):
+        """여러 기기의 일정을 한 번의 쿼리로 다시 읽습니다."""
+        schedules = self._load_many(machine_ids)
+        with self._lock:
+            self._schedules.update(schedules)
+
+    def intervals(self, machine_id, start, end):
+        """기기의 [start, end) 와 겹치는 예약 구간 목록"""
+        with self._lock:
+            return list(self._schedule(machine_id).between(start, end))
+
+    def clear(self):
+        with self._lock:
+            self._schedules.clear()
+
+    def check(self, machine_id, start, end):
+        """
+        [start, end) 구간이 비어 있는지 인덱스와 DB를 함께 확인합니다.
+        트랜잭션 안에서 호출해야 하며, 인덱스와 DB 결과가 다르면 해당 기기의
+        일정을 다시 읽어 인덱스를 맞춥니다.
+        """
+        from .models import Reservation
+
+        if not self.is_free(machine_id, start, end):
+            # 다른 프로세스에서 취소/종료된 예약이 남아 있을 수 있으므로 한 번 다시 읽습니다.
+            self.reload(machine_id)
+            if not self.is_free(machine_id, start, end):
+                return False
+
+        overlaps = Reservation.objects.live().filter(
+            machine_id=machine_id,
+            start_time__lt=end,
+            end_time__gt=start,
+        ).exists()
+        if overlaps:
+            self.reload(machine_id)
+            return False
+        return True
+
+
+availability = AvailabilityIndex()
@@ -0,0 +1,122 @@
+# laundry/benchmarks.py
+"""
+벤치마크 관리 명령(bench_*)에서 함께 쓰는 도구 모음입니다.
+운영 코드에서는 import 하지 않습니다.
+"""
+import base64
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def percentile(samples, pct):
+    """정렬되지 않은 표본에서 pct(0~100) 백분위 값을 구합니다. (nearest-rank)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(samples_ms):
+    return {
+        'count': len(samples_ms),
+        'p50': percentile(samples_ms, 50),
+        'p95': percentile(samples_ms, 95),
+        'p99': percentile(samples_ms, 99),
+        'max': max(samples_ms, default=0.0),
+    }
+
+
+def format_summary(name, summary, elapsed):
+    throughput = summary['count'] / elapsed if elapsed else 0.0
+    return (
+        f"{name}: n={summary['count']} "
+        f"p50={summary['p50']:.1f}ms p95={summary['p95']:.1f}ms p99={summary['p99']:.1f}ms "
+        f"max={summary['max']:.1f}ms {throughput:.1f}/s"
+    )
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
+
+
+class _FakePushHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        service = self.server.service
+        if service.latency:
+            time.sleep(service.latency)
+        status = 410 if self.path.endswith('/gone') else 201
+        with service.lock:
+            service.received += 1
+            service.connections.add(self.client_address)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakePushService:
+    """
+    로컬에서 띄우는 가짜 웹푸시 서비스입니다.
+    모든 요청에 201을, 경로가 /gone 으로 끝나면 410을 돌려주고
+    받은 요청 수와 사용된 TCP 연결 수를 셉니다.
+    """
+
+    def __init__(self, latency_ms=0):
+        self.latency = latency_ms / 1000
+        self.received = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _FakePushHandler)
+        self._server.daemon_threads = True
+        self._server.service = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def fake_vapid_private_key():
+    """VAPID_PRIVATE_KEY 설정과 같은 형식(raw, base64url)의 새 개인키를 만듭니다."""
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    value = ec.generate_private_key(ec.SECP256R1()).private_numbers().private_value
+    return _b64url(value.to_bytes(32, 'big'))
+
+
+def fake_subscription_keys():
+    """브라우저가 만드는 것과 같은 형식의 p256dh/auth 키 한 쌍을 만듭니다."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    public_key = ec.generate_private_key(ec.SECP256R1()).public_key()
+    raw = public_key.public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return _b64url(raw), _b64url(os.urandom(16))
@@ -0,0 +1,124 @@
+# laundry/booking.py
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import occupancy, usage
+from .availability import availability
+from .models import Machine, Reservation, UsageHistory
+from .state import machine_state_changed
+
+
+class ReservationConflict(Exception):
+    """요청한 시간대에 이미 다른 예약이 있을 때 발생합니다."""
+
+    def __init__(self, next_available):
+        super().__init__('해당 시간에 이미 예약이 있습니다.')
+        self.next_available = next_available
+
+
+class IdempotencyKeyReused(Exception):
+    """같은 idempotency_key 로 다른 기기/시간대의 예약을 요청했을 때 발생합니다."""
+
+    def __init__(self, reservation):
+        super().__init__('같은 Idempotency-Key 로 다른 예약을 요청했습니다.')
+        self.reservation = reservation
+
+
+def _existing(user, idempotency_key, machine_id, start, end):
+    """
+    같은 키로 이미 만든 예약. 요청한 구간이 그 예약과 같은 기기, 같은 종료 시각이고 그 안에서 시작해야
+    같은 요청의 재시도로 봅니다. (진행 중인 슬롯을 재시도하면 시작 시각이 지금으로 늦춰짐)
+    """
+    if not idempotency_key:
+        return None
+    existing = Reservation.objects.filter(user=user, idempotency_key=idempotency_key).first()
+    if existing and not (
+        str(existing.machine_id) == str(machine_id)
+        and existing.end_time == end
+        and existing.start_time <= start < end
+    ):
+        raise IdempotencyKeyReused(existing)
+    return existing
+
+
+def create_reservation(user, machine_id, start, end, idempotency_key=None):
+    """
+    기기 예약을 하나의 트랜잭션으로 생성하고 (reservation, created) 를 반환합니다.
+
+    Machine 행을 SELECT ... FOR UPDATE 로 잠근 뒤 겹침을 확인하므로 같은 기기에 대한
+    예약 생성은 DB에서 직렬화되고, 겹치는 예약이 동시에 만들어질 수 없습니다.
+    (DB 제약이 아니라 이 잠금에 기대므로, 예약을 만드는 다른 경로인 promote_waiters 도 같은 행을 먼저 잠급니다.)
+    같은 사용자가 같은 idempotency_key 로 다시 요청하면 기존 예약을 그대로 돌려주고,
+    같은 키로 다른 기기/시간대를 요청하면 IdempotencyKeyReused 를 발생시킵니다.
+
+    Machine.DoesNotExist, ReservationConflict, IdempotencyKeyReused 를 발생시킬 수 있습니다.
+    """
+    existing = _existing(user, idempotency_key, machine_id, start, end)
+    if existing:
+        return existing, False
+
+    with transaction.atomic():
+        machine = Machine.objects.select_for_update().get(pk=machine_id)
+
+        # 같은 키로 동시에 들어온 재시도는 잠금을 기다린 뒤 여기서 걸러집니다.
+        existing = _existing(user, idempotency_key, machine_id, start, end)
+        if existing:
+            return existing, False
+
+        if not availability.check(machine.id, start, end):
+            raise ReservationConflict(
+                availability.next_free_slot(machine.id, end - start, after=start)
+            )
+
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(
+                    user=user,
+                    machine=machine,
+                    start_time=start,
+                    end_time=end,
+                    idempotency_key=idempotency_key or None,
+                )
+        except IntegrityError:
+            existing = _existing(user, idempotency_key, machine_id, start, end)
+            if existing:
+                return existing, False
+            raise
+
+        # 지금 시작하는 예약일 때만 사용 중으로 바뀝니다.
+        occupancy.sync([machine.id])
+        machine_state_changed(machine)
+
+    return reservation, True
+
+
+# 종료 상태별로 사용 기록에 남길 결과
+CLOSE_OUTCOMES = {
+    Reservation.DONE: UsageHistory.COMPLETED,
+    Reservation.CANCELLED: UsageHistory.CANCELLED,
+}
+
+
+def close_reservation(reservation_id, status, from_statuses=Reservation.LIVE_STATUSES, outcome=None, now=None):
+    """
+    진행 중인 예약을 사용 완료(done) 또는 취소(cancelled) 상태로 바꾸고 사용 기록을 남긴 뒤
+    기기 사용 여부를 다시 맞춥니다. 행은 지우지 않고 closed_at 을 기록하며,
+    보관(archive_closed_reservations)은 나중에 따로 합니다.
+
+    from_statuses 상태인 경우에만 조건부 UPDATE 로 바꾸므로 여러 번 호출되어도 한 번만 처리되고,
+    실제로 바꾼 경우에만 예약을 반환합니다. (아니면 None)
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        closed = Reservation.objects.filter(
+            id=reservation_id, status__in=from_statuses
+        ).update(status=status, closed_at=now)
+        if not closed:
+            return None
+        reservation = Reservation.objects.select_related('machine').get(id=reservation_id)
+        usage.record([reservation], outcome or CLOSE_OUTCOMES[status], ended_at=now)
+        # update() 는 post_save 시그널을 보내지 않으므로 인덱스에서 직접 뺍니다.
+        transaction.on_commit(lambda: availability.discard(reservation.id, reservation.machine_id))
+        occupancy.sync([reservation.machine_id], now)
+        machine_state_changed(reservation.machine)
+    return reservation
@@ -0,0 +1,27 @@
+# laundry/building_images.py
+"""
+동 이미지 경로. static/images/building_<이름>.jpg 목록을 앱 시작 시(LaundryConfig.ready) 한 번 읽어 두고,
+렌더링 중에는 파일 시스템을 보지 않고 이 표에서 찾습니다. 이미지를 추가하면 프로세스를 다시 시작해야 합니다.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+IMAGE_DIR = Path(settings.BASE_DIR) / 'static' / 'images'
+DEFAULT_IMAGE_URL = '/static/images/default_building.jpg'
+
+_image_urls = {}
+
+
+def load():
+    global _image_urls
+    _image_urls = {
+        path.stem[len('building_'):]: f'/static/images/{path.name}'
+        for path in IMAGE_DIR.glob('building_*.jpg')
+    }
+
+
+def image_url(building_name):
+    # 이름에서 공백/기호를 뺀 값으로 찾음 (예: A-1 → building_A1.jpg)
+    return _image_urls.get(re.sub(r'[^\w]', '', building_name), DEFAULT_IMAGE_URL)
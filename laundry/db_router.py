@@ -0,0 +1,56 @@
+# laundry/db_router.py
+"""
+읽기 전용 복제본(DATABASES['replica']) 라우팅.
+
+모든 읽기를 복제본으로 보내면 방금 쓴 값을 다시 읽는 흐름(예약 직후 마이페이지 등)이 복제 지연만큼
+옛 값을 보게 되므로, @replica_reads 를 붙인 읽기 전용 뷰(기기 목록, 동별 현황 등)에서만 복제본을 씁니다.
+그 밖의 읽기, 모든 쓰기, select_for_update, 트랜잭션 안의 읽기는 항상 default(주 DB)로 갑니다.
+복제본이 설정되지 않았으면 아무 일도 하지 않습니다.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+
+_use_replica = ContextVar('laundry_use_replica', default=False)
+
+
+@contextmanager
+def reading_from_replica(enabled=True):
+    """블록 안의 읽기를 복제본으로 보냅니다. enabled=False 면 반대로 주 DB 에서 읽도록 고정합니다."""
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_reads(view):
+    """뷰 함수 안의 읽기를 복제본으로 보냅니다. 세션/인증 조회는 뷰 바깥이라 주 DB 에서 읽습니다."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with reading_from_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or REPLICA_DB_ALIAS not in connections.settings:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 복제본은 주 DB 와 같은 데이터이므로 어느 쪽에서 읽은 객체끼리도 관계를 맺을 수 있음
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
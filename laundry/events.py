@@ -0,0 +1,142 @@
+# laundry/events.py
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+CHANNEL_PREFIX = 'laundry:events:building:'
+# Redis 재연결 대기 시간 상한(초)
+RECONNECT_MAX_DELAY = 30
+
+logger = logging.getLogger(__name__)
+
+
+def building_channel(building_id):
+    return f'{CHANNEL_PREFIX}{building_id}'
+
+
+class EventBroker:
+    """
+    동별 기기 상태 이벤트를 이 프로세스에 연결된 SSE 구독자들에게 나눠줍니다.
+    MACHINE_EVENTS_REDIS_URL 이 설정되어 있으면 Redis 채널 하나를 프로세스당 한 번만
+    구독해 Celery 워커 등 다른 프로세스의 이벤트도 받고, 비어 있으면 같은 프로세스
+    안에서 발행된 이벤트만 전달합니다.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, building_id):
+        queue = asyncio.Queue(maxsize=100)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[int(building_id)].add(entry)
+        self._ensure_listener()
+        return entry
+
+    def unsubscribe(self, building_id, entry):
+        with self._lock:
+            self._subscribers[int(building_id)].discard(entry)
+
+    def dispatch(self, building_id, message):
+        """어느 스레드에서든 호출할 수 있으며, 각 구독자의 이벤트 루프로 메시지를 넘깁니다."""
+        with self._lock:
+            entries = list(self._subscribers.get(int(building_id), ()))
+        for loop, queue in entries:
+            loop.call_soon_threadsafe(self._offer, queue, message)
+
+    @staticmethod
+    def _offer(queue, message):
+        # 느린 구독자 때문에 메모리가 쌓이지 않도록 가장 오래된 이벤트를 버립니다.
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def _ensure_listener(self):
+        if not settings.MACHINE_EVENTS_REDIS_URL:
+            return
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._supervise())
+
+    def _has_subscribers(self):
+        with self._lock:
+            return any(self._subscribers.values())
+
+    async def _supervise(self):
+        """
+        Redis 연결이 끊기거나 오류로 구독이 끝나도 구독자가 남아 있는 동안 다시 연결합니다.
+        구독자가 모두 떠나면 끝나고, 다음 구독 때 다시 시작됩니다.
+        """
+        delay = 1
+        while self._has_subscribers():
+            try:
+                await self._listen_redis()
+                # 서버가 연결을 정상적으로 닫은 경우: 잠깐 쉬고 다시 연결
+                delay = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("machine event listener failed, reconnecting in %ss: %s", delay, exc)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _listen_redis(self):
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(settings.MACHINE_EVENTS_REDIS_URL)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+        try:
+            async for item in pubsub.listen():
+                if item['type'] != 'pmessage':
+                    continue
+                channel = item['channel'].decode()
+                self.dispatch(channel[len(CHANNEL_PREFIX):], item['data'].decode())
+        finally:
+            await pubsub.close()
+            await client.aclose()
+
+
+broker = EventBroker()
+
+_redis_client = None
+
+
+def _publisher():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+
+        _redis_client = redis.Redis.from_url(settings.MACHINE_EVENTS_REDIS_URL)
+    return _redis_client
+
+
+def machine_event_payloads(machine_ids):
+    """기기별 사용 여부, 대기 인원, 남은 시간(분)을 한 번의 쿼리로 만듭니다."""
+    from .models import Machine
+
+    now = timezone.now()
+    machines = Machine.objects.with_live_state(now).filter(pk__in=machine_ids)
+    return [m.live_state(now) for m in machines]
+
+
+def _publish(machine_id):
+    for payload in machine_event_payloads([machine_id]):
+        message = json.dumps(payload)
+        if settings.MACHINE_EVENTS_REDIS_URL:
+            _publisher().publish(building_channel(payload['building_id']), message)
+        else:
+            broker.dispatch(payload['building_id'], message)
+
+
+def publish_machine_event(machine_id):
+    """커밋 이후 해당 기기의 최신 상태를 동 채널로 발행합니다."""
+    # 이벤트 발행 실패(Redis 장애 등)가 예약 처리 응답을 막지 않도록 robust=True
+    transaction.on_commit(lambda: _publish(machine_id), robust=True)
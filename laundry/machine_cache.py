@@ -0,0 +1,110 @@
+# laundry/machine_cache.py
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .db_router import reading_from_replica
+from .profiling import count_cache
+
+MACHINE_TYPES = ('washer', 'dryer')
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(kind):
+    with _stats_lock:
+        _stats[kind] += 1
+    count_cache(hits=int(kind == 'hits'), misses=int(kind == 'misses'))
+
+
+def cache_stats():
+    """현재 프로세스의 기기 상태 캐시 적중/실패 횟수"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def machine_cache_key(building_id=None, machine_type=None):
+    return f"laundry:machines:{building_id or 'all'}:{machine_type or 'all'}"
+
+
+def _load_machine_states(building_id, machine_type):
+    from .models import Machine
+    from .serializers import MachineSerializer
+
+    machines = Machine.objects.with_wait_count().with_occupancy().order_by('building_id', 'name')
+    if building_id:
+        machines = machines.filter(building_id=building_id)
+    if machine_type:
+        machines = machines.filter(machine_type=machine_type)
+
+    states = []
+    for machine in machines:
+        data = dict(MachineSerializer(machine).data)
+        data['get_image_url'] = machine.get_image_url
+        states.append(data)
+    return states
+
+
+def get_machine_states(building_id=None, machine_type=None):
+    """
+    동/종류별 기기 상태 목록을 캐시에서 읽고, 없으면 DB에서 읽어 저장합니다.
+    각 항목은 MachineSerializer 결과에 템플릿용 get_image_url 을 더한 dict 입니다.
+    """
+    key = machine_cache_key(building_id, machine_type)
+    states = cache.get(key)
+    if states is not None:
+        _count('hits')
+        return states
+
+    _count('misses')
+    # 무효화 직후 복제 지연으로 옛 상태를 다시 캐시하지 않도록 캐시를 채울 때는 주 DB 에서 읽음
+    with reading_from_replica(False):
+        states = _load_machine_states(building_id, machine_type)
+    cache.set(key, states, settings.MACHINE_CACHE_TTL)
+    return states
+
+
+def machine_state_version_key(building_id=None):
+    return f"laundry:machines:version:{building_id or 'all'}"
+
+
+def machine_state_version(building_id=None):
+    """
+    동(없으면 전체)의 기기 상태 버전. 템플릿 조각 캐시 키에 넣어, 상태가 바뀌면 새 키로 다시 렌더링되게 합니다.
+    """
+    # 처음 만들 때(캐시에서 밀려난 뒤 포함) 시각으로 시작해 예전 버전의 조각과 키가 겹치지 않게 함
+    return cache.get_or_set(machine_state_version_key(building_id), time.time_ns, None)
+
+
+def _bump_versions(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # 아직 없는 버전은 다음 조회 때 새 값으로 만들어짐
+            pass
+
+
+def invalidate_machine_states(building_id):
+    """
+    해당 동의 기기 상태가 바뀌었을 때 호출합니다.
+    동 단위 키와 전체 목록 키를 지우고 조각 캐시 버전을 올립니다. 커밋 전에 다시 캐시된 값이
+    남지 않도록 커밋 이후에 한 번 더 합니다.
+    """
+    keys = [
+        machine_cache_key(b, t)
+        for b in (building_id, None)
+        for t in (*MACHINE_TYPES, None)
+    ]
+    versions = [machine_state_version_key(b) for b in (building_id, None)]
+
+    def invalidate():
+        cache.delete_many(keys)
+        _bump_versions(versions)
+
+    invalidate()
+    transaction.on_commit(invalidate)
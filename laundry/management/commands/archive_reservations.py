@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from laundry.archive import archive_closed_reservations
+
+
+class Command(BaseCommand):
+    help = "Move reservations that were closed (done/cancelled) long ago into the archive table, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="archive reservations closed more than N days ago (default: RESERVATION_ARCHIVE_AFTER)")
+        parser.add_argument('--chunk', type=int, help="rows per transaction (default: RESERVATION_ARCHIVE_CHUNK)")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(days=options['days']) if options['days'] is not None else None
+        moved = archive_closed_reservations(older_than=older_than, chunk_size=options['chunk'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} reservations."))
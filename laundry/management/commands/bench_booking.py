@@ -0,0 +1,152 @@
+import random
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from laundry.benchmarks import Stopwatch, format_summary, latency_summary
+from laundry.management.commands.seed_data import Command as SeedCommand
+from laundry.models import Building, Machine, Reservation, User
+
+PREFIX = 'bench-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a realistic campus and drive the booking endpoints with concurrent clients, "
+        "reporting p50/p95/p99 latency, queries per request and throughput. "
+        "Run offline with DJANGO_DB_ENGINE=sqlite DJANGO_CACHE_BACKEND=locmem MACHINE_EVENTS_REDIS_URL=''."
+    )
+
+    scenarios = ('machine_list', 'remaining_time', 'create_cancel', 'waitlist_join')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--reservations', type=int, default=5000)
+        parser.add_argument('--clients', type=int, default=8, help="concurrent client threads")
+        parser.add_argument('--requests', type=int, default=400, help="requests per scenario")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--scenario', action='append', choices=self.scenarios)
+        parser.add_argument('--keep', action='store_true', help="keep the seeded data afterwards")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        with Stopwatch() as sw:
+            self.seed(options['users'], options['reservations'])
+        self.stdout.write(
+            f"seeded {len(self.machines)} machines, {len(self.user_ids)} users, "
+            f"{options['reservations']} reservations in {sw.ms / 1000:.1f}s"
+        )
+
+        setup_test_environment()
+        try:
+            for name in options['scenario'] or self.scenarios:
+                self.run_scenario(name, options['clients'], options['requests'])
+        finally:
+            teardown_test_environment()
+            if not options['keep']:
+                self.cleanup()
+
+    # ── 데이터 준비 ──
+
+    def seed(self, user_count, reservation_count):
+        self.cleanup()
+        for name, counts in SeedCommand.seed_config.items():
+            building = Building.objects.create(name=f'{PREFIX}{name}')
+            Machine.objects.bulk_create(
+                [Machine(building=building, name=f'W{i}', machine_type='washer') for i in range(1, counts['washers'] + 1)]
+                + [Machine(building=building, name=f'D{i}', machine_type='dryer') for i in range(1, counts['dryers'] + 1)]
+            )
+        self.machines = list(Machine.objects.filter(building__name__startswith=PREFIX).values_list('id', 'building_id'))
+        self.building_ids = sorted({b for _, b in self.machines})
+
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(student_id=f'{PREFIX}{i}', username=f'{PREFIX}{i}', password=password) for i in range(user_count)],
+            batch_size=1000,
+        )
+        self.user_ids = list(User.objects.filter(student_id__startswith=PREFIX).values_list('id', flat=True))
+
+        # 기기별로 겹치지 않게 과거~미래 50분 단위 예약을 깔아 둡니다.
+        now = timezone.now().replace(second=0, microsecond=0)
+        slots = defaultdict(int)
+        reservations = []
+        for i in range(reservation_count):
+            machine_id, _ = self.machines[i % len(self.machines)]
+            slot = slots[machine_id]
+            slots[machine_id] += 1
+            start = now + timedelta(hours=slot - 24)
+            reservations.append(Reservation(
+                user_id=self.rng.choice(self.user_ids),
+                machine_id=machine_id,
+                start_time=start,
+                end_time=start + timedelta(minutes=50),
+                status=Reservation.ACTIVE if start <= now else Reservation.SCHEDULED,
+            ))
+        Reservation.objects.bulk_create(reservations, batch_size=1000)
+
+    def cleanup(self):
+        Building.objects.filter(name__startswith=PREFIX).delete()
+        User.objects.filter(student_id__startswith=PREFIX).delete()
+
+    # ── 시나리오 ──
+
+    def request(self, client, name):
+        machine_id, building_id = self.rng.choice(self.machines)
+        if name == 'machine_list':
+            return [client.get(f'/laundry/api/machines/?building={building_id}&type=washer')]
+        if name == 'remaining_time':
+            return [client.get(f'/laundry/api/remaining-time/?machine_id={machine_id}')]
+        if name == 'waitlist_join':
+            return [client.post('/laundry/waitlist/join/', {'machine_id': machine_id}, content_type='application/json')]
+        if name == 'create_cancel':
+            # 예약 가능 기간(BOOKING_HORIZON) 안에서 고름, 깔아 둔 예약과 겹치면 400 으로 함께 집계됨
+            horizon = int(settings.BOOKING_HORIZON.total_seconds() // 60)
+            start = timezone.now() + timedelta(minutes=self.rng.randrange(60, horizon - 60))
+            created = client.post('/laundry/reservations/create/', {
+                'machine_id': machine_id,
+                'start_time': start.isoformat(),
+                'end_time': (start + timedelta(minutes=50)).isoformat(),
+            }, content_type='application/json')
+            responses = [created]
+            reservation_id = created.json().get('reservation_id') if created.status_code == 200 else None
+            if reservation_id:
+                responses.append(client.post(f'/laundry/reservations/cancel/{reservation_id}/'))
+            return responses
+        raise ValueError(name)
+
+    def run_scenario(self, name, clients, total):
+        local = threading.local()
+        latencies, queries, statuses = [], [], Counter()
+        lock = threading.Lock()
+
+        def one(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(User.objects.get(pk=self.rng.choice(self.user_ids)))
+            with CaptureQueriesContext(connection) as ctx, Stopwatch() as sw:
+                responses = self.request(local.client, name)
+            with lock:
+                latencies.append(sw.ms)
+                queries.append(len(ctx))
+                statuses.update(r.status_code for r in responses)
+
+        with Stopwatch() as sw:
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                list(pool.map(one, range(total)))
+        if not statuses[200]:
+            # 거절 경로만 잰 결과를 예약 성능으로 착각하지 않도록
+            raise CommandError(f"{name}: no request succeeded, status={dict(statuses)}")
+        summary = latency_summary(latencies)
+        self.stdout.write(
+            f"{format_summary(name, summary, sw.ms / 1000)} "
+            f"queries/req={sum(queries) / len(queries):.1f} status={dict(statuses)}"
+        )
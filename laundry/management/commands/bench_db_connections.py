@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from laundry.benchmarks import Stopwatch, format_summary, latency_summary
+from laundry.db_router import reading_from_replica
+from laundry.models import Machine
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the request lifecycle (request_started -> machine listing queries -> request_finished) "
+        "from several worker threads and compare per-request connections (CONN_MAX_AGE=0) with "
+        "persistent connections, reporting latency and how many connections were opened."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="requests per mode")
+        parser.add_argument('--workers', type=int, default=4, help="worker threads (one connection each)")
+        parser.add_argument('--queries', type=int, default=2, help="queries per request")
+        parser.add_argument('--max-age', type=int, default=60, help="CONN_MAX_AGE for the persistent mode")
+        parser.add_argument('--replica', action='store_true', help="run the reads through the replica router")
+
+    def handle(self, *args, **options):
+        if options['replica'] and 'replica' not in settings.DATABASES:
+            raise CommandError("DATABASES['replica'] is not configured (set DJANGO_DB_REPLICA_HOST).")
+        alias = 'replica' if options['replica'] else 'default'
+        self.stdout.write(f"database: {alias} ({connections.settings[alias]['ENGINE']})")
+
+        db_settings = connections.settings[alias]
+        original = db_settings['CONN_MAX_AGE']
+        try:
+            for mode, age in (('per_request', 0), ('persistent', options['max_age'])):
+                db_settings['CONN_MAX_AGE'] = age
+                self.run_mode(mode, options, use_replica=options['replica'])
+        finally:
+            db_settings['CONN_MAX_AGE'] = original
+
+    def run_mode(self, mode, options, use_replica):
+        opened = []
+
+        def on_connect(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        def worker(count):
+            samples = []
+            try:
+                for _ in range(count):
+                    with Stopwatch() as sw:
+                        # 웹 워커와 같은 순서로 연결을 정리/재사용하도록 요청 시작/종료 신호를 그대로 보냄
+                        request_started.send(sender=WSGIHandler, environ={})
+                        try:
+                            with reading_from_replica(use_replica):
+                                for _ in range(options['queries']):
+                                    list(Machine.objects.with_live_state(timezone.now())[:50])
+                        finally:
+                            request_finished.send(sender=WSGIHandler)
+                    samples.append(sw.ms)
+            finally:
+                connections.close_all()
+            return samples
+
+        workers = max(1, options['workers'])
+        share, extra = divmod(options['requests'], workers)
+        counts = [share + (1 if i < extra else 0) for i in range(workers)]
+
+        connection_created.connect(on_connect)
+        try:
+            with Stopwatch() as total, ThreadPoolExecutor(max_workers=workers) as pool:
+                samples = [ms for result in pool.map(worker, counts) for ms in result]
+        finally:
+            connection_created.disconnect(on_connect)
+
+        self.stdout.write(
+            format_summary(mode, latency_summary(samples), total.ms / 1000) + f" connections={len(opened)}"
+        )
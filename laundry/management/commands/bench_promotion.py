@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from laundry.benchmarks import Stopwatch
+from laundry.models import Building, Machine, Reservation, User, WaitList
+from laundry.promotion import promote_waiters
+
+PREFIX = 'bench-promo-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Free every machine of a building at once and measure waitlist promotion throughput, "
+        "comparing one bulk promote_waiters call with per-machine calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--machines', type=int, default=200)
+        parser.add_argument('--waiters', type=int, default=3, help="waiters per machine")
+        parser.add_argument('--keep', action='store_true', help="keep the seeded data afterwards")
+
+    def handle(self, *args, **options):
+        try:
+            for mode in ('per_machine', 'bulk'):
+                machine_ids = self.seed(options['machines'], options['waiters'])
+                with CaptureQueriesContext(connection) as ctx, Stopwatch() as sw:
+                    if mode == 'bulk':
+                        promoted = len(promote_waiters(machine_ids))
+                    else:
+                        promoted = sum(len(promote_waiters([machine_id])) for machine_id in machine_ids)
+                rate = promoted / (sw.ms / 1000) if sw.ms else 0.0
+                self.stdout.write(
+                    f"{mode}: promoted={promoted} in {sw.ms:.1f}ms "
+                    f"({rate:.0f}/s) queries={len(ctx)}"
+                )
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+    def seed(self, machine_count, waiters_per_machine):
+        self.cleanup()
+        building = Building.objects.create(name=f'{PREFIX}building')
+        Machine.objects.bulk_create([
+            Machine(building=building, name=f'W{i}', machine_type='washer')
+            for i in range(1, machine_count + 1)
+        ])
+        machine_ids = list(Machine.objects.filter(building=building).values_list('id', flat=True))
+
+        password = make_password(None)
+        User.objects.bulk_create(
+            [
+                User(student_id=f'{PREFIX}{i}', username=f'{PREFIX}{i}', password=password)
+                for i in range(machine_count * waiters_per_machine)
+            ],
+            batch_size=1000,
+        )
+        user_ids = list(User.objects.filter(student_id__startswith=PREFIX).values_list('id', flat=True))
+
+        # 방금 끝난 예약 + 기기마다 대기자 waiters_per_machine 명
+        now = timezone.now()
+        Reservation.objects.bulk_create([
+            Reservation(
+                user_id=user_ids[i], machine_id=machine_id,
+                start_time=now - timedelta(hours=1), end_time=now - timedelta(seconds=1),
+                status=Reservation.ACTIVE,
+            )
+            for i, machine_id in enumerate(machine_ids)
+        ])
+        WaitList.objects.bulk_create([
+            WaitList(user_id=user_ids[(n * machine_count + i) % len(user_ids)], machine_id=machine_id)
+            for n in range(waiters_per_machine)
+            for i, machine_id in enumerate(machine_ids)
+        ], batch_size=1000)
+        return machine_ids
+
+    def cleanup(self):
+        Building.objects.filter(name__startswith=PREFIX).delete()
+        User.objects.filter(student_id__startswith=PREFIX).delete()
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand
+from pywebpush import webpush, WebPushException
+
+from laundry.benchmarks import FakePushService, Stopwatch, fake_subscription_keys, fake_vapid_private_key
+from laundry.push import PushDispatcher
+
+
+class Command(BaseCommand):
+    help = "Benchmark web-push delivery against a local fake push service"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--latency-ms', type=int, default=20, help="fake push service response delay")
+        parser.add_argument('--baseline', type=int, default=100,
+                            help="messages sent one by one with webpush() for comparison (0 to skip)")
+
+    def handle(self, *args, **options):
+        private_key = fake_vapid_private_key()
+        claims_sub = 'mailto:bench@example.com'
+        p256dh, auth = fake_subscription_keys()
+        payload = json.dumps({"title": "예약 알림", "body": "A동 W1 시작 시각"})
+
+        with FakePushService(latency_ms=options['latency_ms']) as service:
+            def subscription(i):
+                suffix = '/gone' if i % 50 == 0 else ''
+                return {"endpoint": f"{service.url}/push/{i}{suffix}", "keys": {"p256dh": p256dh, "auth": auth}}
+
+            if options['baseline']:
+                with Stopwatch() as sw:
+                    for i in range(options['baseline']):
+                        try:
+                            webpush(subscription(i), data=payload,
+                                    vapid_private_key=private_key, vapid_claims={"sub": claims_sub})
+                        except WebPushException:
+                            pass
+                rate = options['baseline'] / (sw.ms / 1000)
+                self.stdout.write(f"sequential webpush(): {options['baseline']} msgs in {sw.ms:.0f}ms ({rate:.1f}/s)")
+
+            dispatcher = PushDispatcher(private_key, claims_sub, max_workers=options['workers'])
+            service.received = 0
+            service.connections.clear()
+            messages = [(i, subscription(i), payload) for i in range(options['messages'])]
+            with Stopwatch() as sw:
+                statuses = dispatcher.send_all(messages)
+            rate = options['messages'] / (sw.ms / 1000)
+            gone = sum(1 for status in statuses.values() if status == 410)
+            self.stdout.write(
+                f"PushDispatcher ({options['workers']} workers): {options['messages']} msgs in {sw.ms:.0f}ms "
+                f"({rate:.1f}/s), {len(service.connections)} connections, {gone} gone"
+            )
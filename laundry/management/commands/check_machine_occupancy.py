@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from laundry import occupancy
+from laundry.models import Machine
+from laundry.state import machine_state_changed
+
+
+class Command(BaseCommand):
+    help = "Report machines whose is_in_use flag disagrees with their live reservations (one query); --fix repairs them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="reconcile drifted machines instead of failing")
+
+    def handle(self, *args, **options):
+        rows = list(
+            occupancy.drifted().order_by('building__name', 'name')
+            .values_list('id', 'building__name', 'name', 'is_in_use', 'occupied')
+        )
+        for machine_id, building_name, name, is_in_use, occupied in rows:
+            self.stdout.write(
+                f"{building_name}동 {name} (#{machine_id}): is_in_use={is_in_use}, live reservation={occupied}"
+            )
+        if not rows:
+            self.stdout.write(self.style.SUCCESS("All machines match their live reservations."))
+            return
+        if not options['fix']:
+            raise CommandError(f"{len(rows)} machine(s) drifted; run with --fix to reconcile")
+
+        changed = occupancy.sync([row[0] for row in rows])
+        for machine in Machine.objects.filter(id__in=changed):
+            machine_state_changed(machine)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(changed)} machine(s)."))
@@ -0,0 +1,165 @@
+import random
+import secrets
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from laundry import occupancy
+from laundry.benchmarks import Stopwatch
+from laundry.models import Building, Machine, PushSubscription, Reservation, User, WaitList
+from laundry.seeding import batched, bulk_users, ensure_machines
+from laundry.state import machine_set_changed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic campus (buildings, machines, users, reservations, waitlists, push subscriptions) "
+        "for staging and load tests. Rows are streamed into bulk_create in batches and keyed by natural keys "
+        "under --prefix, so re-running with the same options adds nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='seed-', help="prefix for building names, student ids and keys")
+        parser.add_argument('--buildings', type=int, default=5)
+        parser.add_argument('--washers', type=int, default=10, help="washers per building")
+        parser.add_argument('--dryers', type=int, default=8, help="dryers per building")
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--reservations', type=int, default=20000)
+        parser.add_argument('--waitlist', type=int, default=2000, help="machine waitlist entries")
+        parser.add_argument('--push', type=int, default=5000, help="users with a push subscription")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default=None, help="password for every generated user (default: unusable)")
+        parser.add_argument('--delete', action='store_true', help="delete the rows generated under --prefix and exit")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not prefix or len(prefix) + 7 > User._meta.get_field('student_id').max_length:
+            raise CommandError("--prefix must be 1-13 characters long.")
+        if options['delete']:
+            return self.delete(prefix)
+
+        self.prefix = prefix
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(options['seed'])
+
+        machine_ids = self.phase('machines', self.seed_machines, options['buildings'], options['washers'], options['dryers'])
+        user_ids = self.phase('users', self.seed_users, options['users'], options['password'])
+        if not machine_ids or not user_ids:
+            return
+        self.phase('reservations', self.seed_reservations, options['reservations'], machine_ids, user_ids)
+        self.phase('waitlist', self.seed_waitlist, options['waitlist'], machine_ids, user_ids)
+        self.phase('push', self.seed_push, min(options['push'], len(user_ids)), user_ids)
+
+        # bulk_create 는 시그널을 보내지 않으므로 기기 사용 여부와 상태 버전/캐시를 한 번에 맞춤
+        occupancy.sync(machine_ids)
+        for building_id in Building.objects.filter(name__startswith=prefix).values_list('id', flat=True):
+            machine_set_changed(building_id)
+
+    def phase(self, name, func, *args):
+        """func 은 (다음 단계에 넘길 값, 새로 넣은 행 수) 를 돌려줍니다. 다시 실행하면 0 rows 로 나옵니다."""
+        with Stopwatch() as sw:
+            result, rows = func(*args)
+        rate = rows / (sw.ms / 1000) if sw.ms else 0.0
+        self.stdout.write(f"{name}: {rows} rows in {sw.ms / 1000:.1f}s ({rate:.0f}/s)")
+        return result
+
+    # ── 단계별 생성 ──
+
+    def seed_machines(self, building_count, washers, dryers):
+        config = {
+            f'{self.prefix}{i:03d}': {'washers': washers, 'dryers': dryers}
+            for i in range(1, building_count + 1)
+        }
+        scope = Machine.objects.filter(building__name__in=list(config))
+        before = scope.count()
+        ensure_machines(config)
+        machine_ids = list(scope.order_by('id').values_list('id', flat=True))
+        return machine_ids, len(machine_ids) - before
+
+    def seed_users(self, count, password):
+        # 해시는 한 번만 계산해 모든 사용자에게 같은 값을 씀
+        hashed = make_password(password)
+        users = (
+            User(student_id=f'{self.prefix}{i:07d}', username=f'{self.prefix}{i:07d}', password=hashed)
+            for i in range(count)
+        )
+        scope = User.objects.filter(student_id__startswith=self.prefix)
+        before = scope.count()
+        user_ids = list(bulk_users(users, self.batch_size, department='seed'))
+        return user_ids, scope.count() - before
+
+    def seed_reservations(self, count, machine_ids, user_ids):
+        """기기마다 겹치지 않는 1시간 간격 50분 예약을 하루 전부터 차례로 깔아 둡니다."""
+        now = timezone.now()
+        base = now.replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+        def rows():
+            for i in range(count):
+                start = base + timedelta(hours=i // len(machine_ids))
+                end = start + timedelta(minutes=50)
+                if end <= now:
+                    status, closed_at = Reservation.DONE, end
+                elif start <= now:
+                    status, closed_at = Reservation.ACTIVE, None
+                else:
+                    status, closed_at = Reservation.SCHEDULED, None
+                yield Reservation(
+                    user_id=self.rng.choice(user_ids),
+                    machine_id=machine_ids[i % len(machine_ids)],
+                    start_time=start,
+                    end_time=end,
+                    status=status,
+                    closed_at=closed_at,
+                    idempotency_key=f'{self.prefix}{i}',
+                )
+
+        return None, self.bulk(Reservation, rows(), Reservation.objects.filter(idempotency_key__startswith=self.prefix))
+
+    def seed_waitlist(self, count, machine_ids, user_ids):
+        rows = (
+            WaitList(user_id=self.rng.choice(user_ids), machine_id=self.rng.choice(machine_ids))
+            for _ in range(count)
+        )
+        return None, self.bulk(WaitList, rows, WaitList.objects.filter(machine_id__in=machine_ids))
+
+    def seed_push(self, count, user_ids):
+        """앞에서부터 count 명에게 구독을 하나씩 만듭니다. 이미 구독이 있는 사용자는 건너뜀"""
+        total = 0
+        for batch in batched(user_ids[:count], self.batch_size):
+            existing = set(PushSubscription.objects.filter(user_id__in=batch).values_list('user_id', flat=True))
+            rows = [
+                PushSubscription(
+                    user_id=user_id,
+                    endpoint=f'https://push.invalid/{self.prefix}{user_id}',
+                    p256dh_key=secrets.token_urlsafe(65),
+                    auth_key=secrets.token_urlsafe(16),
+                )
+                for user_id in batch if user_id not in existing
+            ]
+            PushSubscription.objects.bulk_create(rows)
+            total += len(rows)
+        return None, total
+
+    def bulk(self, model, rows, scope):
+        """
+        rows 를 넣고 실제로 들어간 행 수를 돌려줍니다.
+        자연 키(예약: (사용자, idempotency_key), 대기열: (사용자, 기기))가 겹치는 행은 DB 가 건너뛰고
+        ignore_conflicts 는 건너뛴 수를 알려주지 않으므로, 생성 대상 범위(scope)의 행 수를 전후로 세어 비교합니다.
+        """
+        before = scope.count()
+        for batch in batched(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+        return scope.count() - before
+
+    def delete(self, prefix):
+        buildings = Building.objects.filter(name__startswith=prefix)
+        users = User.objects.filter(student_id__startswith=prefix)
+        with transaction.atomic():
+            machines, _ = buildings.delete()
+            accounts, _ = users.delete()
+        self.stdout.write(f"deleted {machines + accounts} rows under prefix {prefix!r}")
@@ -1,8 +1,9 @@
 from django.core.management.base import BaseCommand
-from laundry.models import Building, Machine
+
+from laundry.seeding import ensure_machines
 
 class Command(BaseCommand):
-    help = "Seed initial buildings and machines"
+    help = "Seed initial buildings and machines (safe to re-run: existing machines are kept)"
 
     seed_config = {
         'A': {'washers': 10, 'dryers': 7},
@@ -13,10 +14,5 @@ class Command(BaseCommand):
     }
 
     def handle(self, *args, **options):
-        for name, counts in self.seed_config.items():
-            bldg, _ = Building.objects.get_or_create(name=name)
-            for i in range(1, counts['washers'] + 1):
-                Machine.objects.create(building=bldg, name=f"W{i}", machine_type='washer')
-            for i in range(1, counts['dryers'] + 1):
-                Machine.objects.create(building=bldg, name=f"D{i}", machine_type='dryer')
-        self.stdout.write(self.style.SUCCESS("Seeding completed."))
\ No newline at end of file
+        created = ensure_machines(self.seed_config)
+        self.stdout.write(self.style.SUCCESS(f"Seeding completed. ({created} machines added)"))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0003_reservation_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(max_length=20)),
+                ('department', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username',
+            field=models.CharField(max_length=30, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', '-start_time'], name='reservation_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waitlist',
+            index=models.Index(fields=['machine', 'created_at'], name='waitlist_machine_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.CheckConstraint(condition=models.Q(('end_time__gt', models.F('start_time'))), name='end_after_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(fields=('machine', 'start_time', 'end_time'), name='unique_machine_reservation'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0005_reservation_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_user_idempotency_key'),
+        ),
+    ]
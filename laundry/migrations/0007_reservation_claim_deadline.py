@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0006_reservation_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='claim_deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='status',
+            field=models.CharField(choices=[('offered', '확인 대기'), ('scheduled', '예약됨'), ('active', '사용 중')], default='scheduled', max_length=10),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0007_reservation_claim_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waitlist',
+            name='building',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pool_waits', to='laundry.building'),
+        ),
+        migrations.AddField(
+            model_name='waitlist',
+            name='machine_type',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='waitlist',
+            name='machine',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='laundry.machine'),
+        ),
+        migrations.AddIndex(
+            model_name='waitlist',
+            index=models.Index(fields=['building', 'machine_type', 'created_at'], name='waitlist_pool_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlist',
+            constraint=models.UniqueConstraint(fields=('user', 'building', 'machine_type'), name='unique_user_pool_wait'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlist',
+            constraint=models.CheckConstraint(condition=models.Q(('machine__isnull', False), models.Q(('building__isnull', False), models.Q(('machine_type', ''), _negated=True)), _connector='OR'), name='waitlist_has_target'),
+        ),
+    ]
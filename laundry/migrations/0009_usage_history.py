@@ -0,0 +1,65 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0008_waitlist_pool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30, unique=True)),
+                ('last_history_id', models.BigIntegerField(default=0)),
+                ('since', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UsageHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reservation_id', models.BigIntegerField(unique=True)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('outcome', models.CharField(choices=[('completed', '사용 완료'), ('cancelled', '취소'), ('expired', '확인 기한 만료')], max_length=10)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='laundry.machine')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MachineDurationBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minutes', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duration_buckets', to='laundry.machine')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('machine', 'minutes'), name='unique_machine_duration_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MachineUsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('occupied_seconds', models.BigIntegerField(default=0)),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_rollups', to='laundry.machine')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('machine', 'weekday', 'hour'), name='unique_machine_usage_bin')],
+            },
+        ),
+    ]
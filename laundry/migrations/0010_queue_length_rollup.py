@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0009_usage_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueLengthRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('machine_type', models.CharField(max_length=10)),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('waiters', models.PositiveIntegerField(default=0)),
+                ('building', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_rollups', to='laundry.building')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('building', 'machine_type', 'weekday', 'hour'), name='unique_queue_length_bin')],
+            },
+        ),
+    ]
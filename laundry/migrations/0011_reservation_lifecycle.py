@@ -0,0 +1,72 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0010_queue_length_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('status', models.CharField(choices=[('offered', '확인 대기'), ('scheduled', '예약됨'), ('active', '사용 중'), ('done', '사용 완료'), ('cancelled', '취소됨')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('idempotency_key', models.CharField(blank=True, max_length=64, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='reservation',
+            name='unique_machine_reservation',
+        ),
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='reservation_end_idx',
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='status',
+            field=models.CharField(choices=[('offered', '확인 대기'), ('scheduled', '예약됨'), ('active', '사용 중'), ('done', '사용 완료'), ('cancelled', '취소됨')], default='scheduled', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['machine', 'status', 'end_time'], name='reservation_machine_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'end_time'], name='reservation_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'closed_at'], name='reservation_closed_idx'),
+        ),
+        migrations.AddField(
+            model_name='reservationarchive',
+            name='machine',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='laundry.machine'),
+        ),
+        migrations.AddField(
+            model_name='reservationarchive',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='reservationarchive',
+            index=models.Index(fields=['user', '-start_time'], name='archive_user_start_idx'),
+        ),
+    ]
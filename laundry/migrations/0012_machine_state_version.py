@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0011_reservation_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='building',
+            name='snapshot_version',
+            field=models.BigIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='state_version',
+            field=models.BigIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='machine',
+            name='state_version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='machine',
+            index=models.Index(fields=['building', 'state_version'], name='machine_state_version_idx'),
+        ),
+    ]
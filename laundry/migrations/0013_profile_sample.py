@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry', '0012_machine_state_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveIntegerField(unique=True)),
+                ('kind', models.CharField(choices=[('request', '요청'), ('task', '태스크')], max_length=10)),
+                ('name', models.CharField(max_length=200)),
+                ('detail', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('duration_ms', models.FloatField()),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('db_ms', models.FloatField(default=0)),
+                ('cache_hits', models.PositiveIntegerField(default=0)),
+                ('cache_misses', models.PositiveIntegerField(default=0)),
+                ('slowest_sql', models.TextField(blank=True)),
+                ('slowest_sql_ms', models.FloatField(default=0)),
+                ('recorded_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+            },
+        ),
+    ]
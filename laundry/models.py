@@ -1,13 +1,19 @@
 from django.db import models
+from django.db.models import Count, Exists, F, Func, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.base_user import BaseUserManager
+from rest_framework.authtoken.models import Token
+from . import building_images
+from .availability import availability
 import os
-import re
 
 class UserManager(BaseUserManager):
     def create_user(self, student_id, username, password=None, **extra_fields):
@@ -40,40 +46,159 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.student_id
 
+class ReservationQuerySet(models.QuerySet):
+    def live(self):
+        """아직 끝나지 않은(확인 대기/예약됨/사용 중) 예약만. 예약 가능 여부, 남은 시간 등 실시간 조회용"""
+        return self.filter(status__in=Reservation.LIVE_STATUSES)
+
 class Reservation(models.Model):
+    OFFERED = 'offered'
+    SCHEDULED = 'scheduled'
+    ACTIVE = 'active'
+    DONE = 'done'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = (
+        (OFFERED, '확인 대기'),
+        (SCHEDULED, '예약됨'),
+        (ACTIVE, '사용 중'),
+        (DONE, '사용 완료'),
+        (CANCELLED, '취소됨'),
+    )
+    LIVE_STATUSES = (OFFERED, SCHEDULED, ACTIVE)
+    CLOSED_STATUSES = (DONE, CANCELLED)
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     machine = models.ForeignKey('Machine', on_delete=models.CASCADE)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
+    confirmed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=SCHEDULED)
+    # 발송한 알림 단계 (0: 없음, 1: 10분 전, 2: 시작 시각)
+    reminders_sent = models.PositiveSmallIntegerField(default=0)
+    # 클라이언트 재시도 시 중복 예약 방지용 키 (Idempotency-Key 헤더)
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    # 대기열 승격 예약(offered)의 확인 기한
+    claim_deadline = models.DateTimeField(null=True, blank=True)
+    # 사용 완료/취소된 시각. 이 시각이 RESERVATION_ARCHIVE_AFTER 보다 오래되면 보관 테이블로 옮깁니다.
+    closed_at = models.DateTimeField(null=True, blank=True)
 
-    def __str__(self):
-        return f"{self.user.student_id} - {self.machine} ({self.start_time} to {self.end_time})"
-    
-class Meta:
+    objects = ReservationQuerySet.as_manager()
+
+    class Meta:
+        # 취소된 예약과 같은 시간대를 다시 예약할 수 있어야 하므로 (machine, start_time, end_time)
+        # 유일 제약은 두지 않습니다. 겹침은 create_reservation 의 기기 행 잠금이 막습니다.
         constraints = [
             models.CheckConstraint(
-                check=models.Q(end_time__gt=models.F('start_time')),
+                condition=models.Q(end_time__gt=models.F('start_time')),
                 name='end_after_start'
             ),
             models.UniqueConstraint(
-                fields=['machine', 'start_time', 'end_time'],
-                name='unique_machine_reservation'
+                fields=['user', 'idempotency_key'],
+                name='unique_user_idempotency_key'
             ),
         ]
-        def clean(self):
-            if self.end_time <= self.start_time:
-                raise ValidationError("종료 시간은 시작 시간 이후여야 합니다.")
+        indexes = [
+            # 마이페이지 최신순 목록
+            models.Index(fields=['user', '-start_time'], name='reservation_user_start_idx'),
+            # 기기별 진행 중 예약: 겹침 확인, 남은 시간
+            models.Index(fields=['machine', 'status', 'end_time'], name='reservation_machine_live_idx'),
+            # 예약 스케줄러: 시작/알림 대상, 종료 대상
+            models.Index(fields=['status', 'start_time'], name='reservation_status_start_idx'),
+            models.Index(fields=['status', 'end_time'], name='reservation_status_end_idx'),
+            # 보관 대상
+            models.Index(fields=['status', 'closed_at'], name='reservation_closed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.student_id} - {self.machine} ({self.start_time} to {self.end_time})"
+
+    def clean(self):
+        if self.end_time <= self.start_time:
+            raise ValidationError("종료 시간은 시작 시간 이후여야 합니다.")
+
+class ReservationArchive(models.Model):
+    """
+    사용 완료/취소 후 RESERVATION_ARCHIVE_AFTER 가 지난 예약의 보관 사본입니다.
+    원래 예약 id 를 그대로 기본 키로 씁니다. 감사/조회용이며 실시간 경로에서는 읽지 않습니다.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    machine = models.ForeignKey('Machine', on_delete=models.SET_NULL, null=True, blank=True)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=Reservation.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    closed_at = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-start_time'], name='archive_user_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.machine_id} ({self.start_time} to {self.end_time}, {self.status})"
+
+class WaitListQuerySet(models.QuerySet):
+    def with_position(self):
+        """
+        같은 대기열에서 앞에 있는 인원(queue_ahead)과 대기열 길이(queue_length)를 함께 읽습니다.
+        기기별/통합 대기열을 각각의 (대기열, created_at) 인덱스로 세도록 서브쿼리를 나눠 더합니다.
+        (한 행은 둘 중 한 대기열에만 속하므로 나머지 쪽은 항상 0입니다.)
+        """
+        def count(queryset):
+            return Coalesce(Subquery(
+                queryset.order_by().annotate(n=Func(F('id'), function='COUNT')).values('n')[:1]
+            ), 0)
+
+        machine_queue = WaitList.objects.filter(machine=OuterRef('machine'))
+        pool_queue = WaitList.objects.filter(
+            machine__isnull=True, building=OuterRef('building'), machine_type=OuterRef('machine_type')
+        )
+        ahead = Q(created_at__lt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), id__lt=OuterRef('id'))
+        return self.annotate(
+            queue_ahead=count(machine_queue.filter(ahead)) + count(pool_queue.filter(ahead)),
+            queue_length=count(machine_queue) + count(pool_queue),
+        )
 
 class WaitList(models.Model):
+    """
+    기기 대기열 한 칸입니다. machine 이 있으면 특정 기기 대기열,
+    machine 이 비어 있으면 building 의 machine_type 기기 중 먼저 비는 기기를 기다리는 통합 대기열입니다.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    machine = models.ForeignKey('Machine', on_delete=models.CASCADE)
+    machine = models.ForeignKey('Machine', on_delete=models.CASCADE, null=True, blank=True)
+    building = models.ForeignKey('Building', on_delete=models.CASCADE, null=True, blank=True, related_name='pool_waits')
+    machine_type = models.CharField(max_length=10, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = WaitListQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'machine')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'building', 'machine_type'],
+                name='unique_user_pool_wait'
+            ),
+            models.CheckConstraint(
+                condition=models.Q(machine__isnull=False) | (models.Q(building__isnull=False) & ~models.Q(machine_type='')),
+                name='waitlist_has_target'
+            ),
+        ]
+        indexes = [
+            # 기기별 대기 순서 (list_waitlist, 대기 순번, 승격)
+            models.Index(fields=['machine', 'created_at'], name='waitlist_machine_created_idx'),
+            # 통합 대기열 순서
+            models.Index(fields=['building', 'machine_type', 'created_at'], name='waitlist_pool_created_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.student_id} waiting for {self.machine}"
+        if self.machine_id:
+            return f"{self.user.student_id} waiting for {self.machine}"
+        return f"{self.user.student_id} waiting for any {self.machine_type} in {self.building}"
     
 class PushSubscription(models.Model):
     """
@@ -90,17 +215,67 @@ class PushSubscription(models.Model):
     def __str__(self):
         return f"PushSubscription for {self.user.student_id}" 
 
+class BuildingQuerySet(models.QuerySet):
+    def with_machine_counts(self):
+        """
+        동별 전체/사용 중/세탁기/건조기 수와 대기열 길이를 한 번의 쿼리로 집계합니다.
+        machines 와 waitlist 를 함께 JOIN 하므로 중복 집계를 막기 위해 distinct 를 씁니다.
+        사용 중 기기 수(진행 중 예약 기준)와 통합 대기열 인원은 JOIN 을 더 늘리지 않도록 서브쿼리로 셉니다.
+        """
+        in_use = (
+            Machine.objects.with_occupancy().filter(building=OuterRef('pk'), occupied=True)
+            .order_by().values('building').annotate(n=Count('id')).values('n')
+        )
+        pool_waits = (
+            WaitList.objects.filter(building=OuterRef('pk'), machine__isnull=True)
+            .order_by().values('building').annotate(n=Count('id')).values('n')
+        )
+        return self.annotate(
+            total_count=Count('machines', distinct=True),
+            in_use_count=Coalesce(Subquery(in_use), 0),
+            washer_count=Count('machines', filter=Q(machines__machine_type='washer'), distinct=True),
+            dryer_count=Count('machines', filter=Q(machines__machine_type='dryer'), distinct=True),
+            waitlist_count=Count('machines__waitlist', distinct=True) + Coalesce(Subquery(pool_waits), 0),
+        )
+
 class Building(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    # 기기 상태 버전: 동의 기기 상태가 바뀔 때마다 1씩 오르며 (state.machine_state_changed),
+    # 기기가 추가/삭제되면 그 버전을 snapshot_version 에 적어 그 이전 버전부터의 변경분 대신 전체 목록을 돌려줌
+    state_version = models.BigIntegerField(default=1)
+    snapshot_version = models.BigIntegerField(default=1)
+
+    objects = BuildingQuerySet.as_manager()
 
     @property
     def get_image_url(self):
-        # building 이름에서 알파벳, 숫자만 추출 (예: A동 → A)
-        name_safe = re.sub(r'[^\w]', '', self.name)
-        static_filename = f'building_{name_safe}.jpg'
+        # 시작 시 읽어 둔 이미지 목록에서 찾고, 없으면 기본 이미지
+        return building_images.image_url(self.name)
 
-        # 반환만 하고 존재 여부는 브라우저에게 맡김 (404면 default 쓰도록)
-        return f'/static/images/{static_filename}'
+class MachineQuerySet(models.QuerySet):
+    def with_occupancy(self, now=None):
+        """
+        지금 진행 중인 예약이 있는지(occupied)를 EXISTS 로 함께 읽습니다.
+        기기 사용 여부는 is_in_use 플래그가 아니라 이 값이 기준이며, 플래그는 reconcile 이 맞춥니다.
+        """
+        now = now or timezone.now()
+        return self.annotate(occupied=Exists(Reservation.objects.live().filter(
+            machine=OuterRef('pk'), start_time__lte=now, end_time__gt=now,
+        )))
+
+    def with_wait_count(self):
+        """동 정보와 기기별 대기 인원을 함께 읽어 목록 렌더링 시 추가 쿼리가 없도록 합니다."""
+        return self.select_related('building').annotate(wait_count=Count('waitlist'))
+
+    def with_live_state(self, now=None):
+        """with_wait_count() 에 현재 진행 중인 예약의 종료 시각(active_end)을 더해 한 번의 쿼리로 읽습니다."""
+        now = now or timezone.now()
+        active_end = Reservation.objects.live().filter(
+            machine=OuterRef('pk'),
+            start_time__lte=now,
+            end_time__gt=now,
+        ).order_by('end_time').values('end_time')[:1]
+        return self.with_wait_count().annotate(active_end=Subquery(active_end))
 
 class Machine(models.Model):
     MACHINE_TYPES = (
@@ -111,7 +286,28 @@ class Machine(models.Model):
     building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name='machines')
     machine_type = models.CharField(max_length=10, choices=MACHINE_TYPES)
     image = models.ImageField(upload_to='machine_images/', blank=True, null=True)
+    # 진행 중 예약이 있는지의 비정규화 사본. 조회는 with_occupancy() 를 쓰고, 값은 occupancy.sync() 가 맞춥니다.
     is_in_use = models.BooleanField(default=False)
+    # 마지막으로 상태가 바뀌었을 때의 동 state_version
+    state_version = models.BigIntegerField(default=0)
+
+    objects = MachineQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['building', 'state_version'], name='machine_state_version_idx'),
+        ]
+
+    def live_state(self, now):
+        """Machine.objects.with_live_state() 로 읽은 기기의 실시간 상태 dict"""
+        return {
+            'machine_id': self.id,
+            'building_id': self.building_id,
+            'is_in_use': self.active_end is not None,
+            'wait_count': self.wait_count,
+            'reservation_end': timezone.localtime(self.active_end).isoformat() if self.active_end else None,
+            'remaining_minutes': int((self.active_end - now).total_seconds() // 60) if self.active_end else None,
+        }
 
     @property
     def get_image_url(self):
@@ -132,7 +328,197 @@ class Profile(models.Model):
     def __str__(self):
         return f'{self.user.username} 프로필'
 
+class UsageHistory(models.Model):
+    """
+    끝난 예약 한 건의 기록입니다. 예약이 사용 완료/취소/만료로 닫힐 때(close_reservation 의 상태 UPDATE)
+    같은 트랜잭션에서 남기며, 예약 행은 closed_at 과 함께 남았다가 나중에 보관 테이블로 옮겨집니다.
+    집계(rollup_usage)의 입력으로만 쓰고 화면에서 직접 읽지 않습니다.
+    """
+    COMPLETED = 'completed'
+    CANCELLED = 'cancelled'
+    EXPIRED = 'expired'
+    OUTCOME_CHOICES = (
+        (COMPLETED, '사용 완료'),
+        (CANCELLED, '취소'),
+        (EXPIRED, '확인 기한 만료'),
+    )
+
+    reservation_id = models.BigIntegerField(unique=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    machine = models.ForeignKey('Machine', on_delete=models.CASCADE)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    # 실제로 끝난(종료/취소된) 시각. 예약 시간보다 일찍 취소되면 end_time 보다 이릅니다.
+    ended_at = models.DateTimeField()
+    outcome = models.CharField(max_length=10, choices=OUTCOME_CHOICES)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.machine_id} {self.start_time} ~ {self.ended_at} ({self.outcome})"
+
+    @property
+    def occupied(self):
+        """기기를 실제로 점유한 구간 (start, end). 시작 전에 끝났으면 None"""
+        end = min(self.end_time, self.ended_at)
+        return (self.start_time, end) if end > self.start_time else None
+
+class MachineUsageRollup(models.Model):
+    """기기별 요일(0=월)/시간대별 누적 점유 시간(초)과 그 시간대에 시작한 사용 횟수"""
+    machine = models.ForeignKey('Machine', on_delete=models.CASCADE, related_name='usage_rollups')
+    weekday = models.PositiveSmallIntegerField()
+    hour = models.PositiveSmallIntegerField()
+    occupied_seconds = models.BigIntegerField(default=0)
+    sessions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['machine', 'weekday', 'hour'], name='unique_machine_usage_bin'),
+        ]
+
+class MachineDurationBucket(models.Model):
+    """기기별 사용 시간 분포: minutes 이상 minutes + USAGE_DURATION_BUCKET 미만인 사용 횟수"""
+    machine = models.ForeignKey('Machine', on_delete=models.CASCADE, related_name='duration_buckets')
+    minutes = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['machine', 'minutes'], name='unique_machine_duration_bucket'),
+        ]
+
+class QueueLengthRollup(models.Model):
+    """
+    동/기기 종류별 요일(0=월)/시간대별 대기 인원 표본의 합계입니다.
+    rollup_usage 가 실행될 때마다 현재 대기 인원(기기별 + 통합 대기열)을 한 표본으로 더합니다.
+    """
+    building = models.ForeignKey('Building', on_delete=models.CASCADE, related_name='queue_rollups')
+    machine_type = models.CharField(max_length=10)
+    weekday = models.PositiveSmallIntegerField()
+    hour = models.PositiveSmallIntegerField()
+    samples = models.PositiveIntegerField(default=0)
+    waiters = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['building', 'machine_type', 'weekday', 'hour'], name='unique_queue_length_bin'
+            ),
+        ]
+
+class UsageRollupState(models.Model):
+    """증분 집계 진행 상황: last_history_id 까지의 UsageHistory 가 집계에 반영되었습니다."""
+    name = models.CharField(max_length=30, unique=True)
+    last_history_id = models.BigIntegerField(default=0)
+    # 집계에 반영된 가장 이른 사용 시작 시각 (점유율 계산 시 관측 기간)
+    since = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_history_id}"
+
+class ProfileSample(models.Model):
+    """
+    요청/태스크 프로파일링 표본 (laundry.profiling). PROFILING_BUFFER_SIZE 개의 slot 을 돌아가며 덮어쓰는
+    링 버퍼라 행 수가 늘지 않으며, 관리 화면에서 느린 요청과 가장 느린 SQL 을 확인하는 용도입니다.
+    """
+    REQUEST = 'request'
+    TASK = 'task'
+    KIND_CHOICES = (
+        (REQUEST, '요청'),
+        (TASK, '태스크'),
+    )
+
+    slot = models.PositiveIntegerField(unique=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # URL 이름(laundry:...) 또는 태스크 이름
+    name = models.CharField(max_length=200)
+    # 요청이면 "메서드 경로", 태스크면 태스크 id
+    detail = models.CharField(max_length=255, blank=True)
+    # HTTP 상태 코드 또는 태스크 상태
+    status = models.CharField(max_length=20, blank=True)
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    cache_misses = models.PositiveIntegerField(default=0)
+    slowest_sql = models.TextField(blank=True)
+    slowest_sql_ms = models.FloatField(default=0)
+    recorded_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-recorded_at']
+
+    def __str__(self):
+        return f"{self.name} {self.duration_ms:.0f}ms ({self.recorded_at})"
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+def _forget_tokens(keys):
+    from .authentication import forget_token
+
+    def forget():
+        for key in keys:
+            forget_token(key)
+    # 커밋 전에 다른 요청이 옛 값을 다시 캐시하지 않도록 커밋 후에도 한 번 더 비움
+    forget()
+    transaction.on_commit(forget, robust=True)
+
+@receiver(post_save, sender=User)
+def refresh_user_tokens(sender, instance, created, update_fields=None, **kwargs):
+    # 공유 캐시에 is_active 가 들어 있으므로 비활성화 등 변경을 바로 반영 (로그인 시각 갱신은 제외)
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    _forget_tokens(list(Token.objects.filter(user=instance).values_list('key', flat=True)))
+
+@receiver(post_delete, sender=Token)
+def revoke_token(sender, instance, **kwargs):
+    _forget_tokens([instance.key])
+
+@receiver(post_save, sender=WaitList)
+def mirror_waitlist_join(sender, instance, created, **kwargs):
+    if created:
+        from .waitlist import schedule_mirror_add
+        schedule_mirror_add(instance)
+
+@receiver(post_delete, sender=WaitList)
+def mirror_waitlist_leave(sender, instance, **kwargs):
+    from .waitlist import schedule_mirror_remove
+    schedule_mirror_remove(instance)
+
+@receiver(post_save, sender=Reservation)
+def sync_reservation_availability(sender, instance, **kwargs):
+    # 롤백된 저장이 인덱스에 남지 않도록 커밋 이후에 반영
+    if instance.status in Reservation.LIVE_STATUSES:
+        transaction.on_commit(lambda: availability.add(instance))
+    else:
+        reservation_id, machine_id = instance.id, instance.machine_id
+        transaction.on_commit(lambda: availability.discard(reservation_id, machine_id))
+
+@receiver(post_delete, sender=Reservation)
+def discard_reservation_availability(sender, instance, **kwargs):
+    # delete() 이후 instance.id 가 None 으로 바뀌므로 미리 값을 잡아둡니다.
+    reservation_id, machine_id = instance.id, instance.machine_id
+    transaction.on_commit(lambda: availability.discard(reservation_id, machine_id))
+
+@receiver(post_save, sender=Machine)
+def machine_saved(sender, instance, created, **kwargs):
+    # 관리 화면 등에서 기기를 추가/수정하면 상태 버전과 목록/페이지 조각 캐시를 새로 만듦
+    from .state import machine_set_changed, machine_state_changed
+    if created:
+        machine_set_changed(instance.building_id)
+    else:
+        machine_state_changed(instance)
+
+@receiver(post_delete, sender=Machine)
+def machine_deleted(sender, instance, **kwargs):
+    from .state import machine_set_changed
+    machine_set_changed(instance.building_id)
+
+@receiver(post_save, sender=Building)
+@receiver(post_delete, sender=Building)
+def invalidate_building_pages(sender, instance, **kwargs):
+    from .machine_cache import invalidate_machine_states
+    invalidate_machine_states(instance.id)
@@ -0,0 +1,47 @@
+# laundry/occupancy.py
+"""
+기기 사용 여부는 진행 중 예약(start_time <= now < end_time 인 live 예약)에서 계산합니다.
+Machine.is_in_use 는 목록 필터/관리 화면용 비정규화 사본이며, 여기의 sync() 만 조건부 UPDATE 로
+바꿉니다. 태스크 유실 등으로 어긋난 값은 reconcile_machine_occupancy 가 주기적으로 맞춥니다.
+"""
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Machine, Reservation
+
+
+def _occupied(now):
+    return Exists(Reservation.objects.live().filter(
+        machine=OuterRef('pk'), start_time__lte=now, end_time__gt=now,
+    ))
+
+
+def drifted(now=None):
+    """is_in_use 가 진행 중 예약과 어긋난 기기 (occupied 에 실제 값이 들어 있음)"""
+    return Machine.objects.with_occupancy(now).filter(
+        Q(is_in_use=True, occupied=False) | Q(is_in_use=False, occupied=True)
+    )
+
+
+def sync(machine_ids=None, now=None):
+    """
+    is_in_use 를 진행 중 예약에 맞추고, 값이 바뀐 기기 id 목록을 반환합니다.
+    machine_ids 가 없으면 모든 기기를 확인합니다.
+    UPDATE 는 예약 조건을 다시 확인하므로, 확인과 갱신 사이에 예약이 바뀌어도 잘못된 값을 쓰지 않습니다.
+    """
+    now = now or timezone.now()
+    candidates = drifted(now)
+    if machine_ids is not None:
+        candidates = candidates.filter(id__in=machine_ids)
+    rows = list(candidates.values_list('id', 'occupied'))
+    if not rows:
+        return []
+
+    occupied = _occupied(now)
+    on = [machine_id for machine_id, is_occupied in rows if is_occupied]
+    off = [machine_id for machine_id, is_occupied in rows if not is_occupied]
+    if on:
+        Machine.objects.filter(occupied, id__in=on, is_in_use=False).update(is_in_use=True)
+    if off:
+        Machine.objects.filter(~occupied, id__in=off, is_in_use=True).update(is_in_use=False)
+    return [machine_id for machine_id, _ in rows]
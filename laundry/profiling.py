@@ -0,0 +1,313 @@
+# laundry/profiling.py
+"""
+요청/태스크 프로파일링 (opt-in, PROFILING_ENABLED).
+
+- ProfilingMiddleware 와 Celery task_prerun/task_postrun 시그널이 laundry 뷰/태스크 한 건마다
+  걸린 시간, DB 쿼리 수와 시간, 캐시 적중/실패 수, 가장 느린 SQL 을 잽니다.
+  쿼리는 connection_created 시그널로 모든 DB 연결에 건 execute wrapper 가 세므로
+  sync_to_async 로 다른 스레드에서 실행된 쿼리도 포함됩니다.
+- 누적값은 프로세스 안에 모았다가 PROFILING_FLUSH_INTERVAL 초마다(태스크는 끝날 때마다) 공유 캐시에
+  더하므로, 웹/워커 프로세스의 값이 metrics/ 에서 Prometheus 텍스트 형식으로 함께 보입니다.
+- PROFILING_SAMPLE_RATE 비율의 표본과 PROFILING_SLOW_MS 보다 느리거나 실패한 건은 ProfileSample
+  링 버퍼에 남겨 관리 화면에서 봅니다.
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('laundry_profile', default=None)
+
+# 요청/태스크 걸린 시간 히스토그램 구간(초)
+BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNTERS = ('count', 'failures', 'duration_us', 'queries', 'db_us', 'cache_hits', 'cache_misses')
+FIELDS = COUNTERS + tuple(f'bucket_{i}' for i in range(len(BUCKETS)))
+LABELS = {'request': 'view', 'task': 'task'}
+NAMES_KEY = 'laundry:metrics:names'
+CURSOR_KEY = 'laundry:metrics:sample_cursor'
+SQL_LIMIT = 2000
+
+
+class Measurement:
+    """요청/태스크 한 건의 측정값"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_sql = ''
+        self.slowest_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def query(self, sql, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_sql, self.slowest_seconds = sql, seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+def count_cache(hits=0, misses=0):
+    """캐시 조회 결과를 지금 측정 중인 요청/태스크에 더합니다. 측정 중이 아니면 아무 일도 하지 않습니다."""
+    measurement = _current.get()
+    if measurement is not None:
+        measurement.cache_hits += hits
+        measurement.cache_misses += misses
+
+
+def _record_query(execute, sql, params, many, context):
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measurement.query(sql, time.perf_counter() - start)
+
+
+def _instrument(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def start():
+    """측정을 시작하고 stop() 에 넘길 토큰을 돌려줍니다."""
+    measurement = Measurement()
+    return measurement, _current.set(measurement)
+
+
+def stop(token):
+    """측정을 끝내고 측정값을 돌려줍니다. start() 를 부른 컨텍스트에서 불러야 합니다."""
+    measurement, context_token = token
+    _current.reset(context_token)
+    return measurement
+
+
+def record(measurement, kind, name, detail, status, failed):
+    """측정값을 누적값에 더하고, 표본 대상이면 링 버퍼에 남깁니다. (DB/캐시를 쓰므로 동기 컨텍스트에서)"""
+    duration = measurement.elapsed()
+    _metrics.add(kind, name, duration, measurement, failed)
+    if failed or duration * 1000 >= settings.PROFILING_SLOW_MS or random.random() < settings.PROFILING_SAMPLE_RATE:
+        _save_sample(kind, name, detail, status, duration, measurement)
+    _metrics.flush(force=kind == 'task')
+
+
+def _save_sample(kind, name, detail, status, duration, measurement):
+    from .models import ProfileSample
+
+    try:
+        try:
+            cursor = cache.incr(CURSOR_KEY)
+        except ValueError:
+            cache.add(CURSOR_KEY, 0, None)
+            cursor = cache.incr(CURSOR_KEY)
+        ProfileSample.objects.update_or_create(slot=cursor % settings.PROFILING_BUFFER_SIZE, defaults={
+            'kind': kind,
+            'name': name[:200],
+            'detail': detail[:255],
+            'status': str(status)[:20],
+            'duration_ms': duration * 1000,
+            'query_count': measurement.queries,
+            'db_ms': measurement.db_seconds * 1000,
+            'cache_hits': measurement.cache_hits,
+            'cache_misses': measurement.cache_misses,
+            'slowest_sql': measurement.slowest_sql[:SQL_LIMIT],
+            'slowest_sql_ms': measurement.slowest_seconds * 1000,
+            'recorded_at': timezone.now(),
+        })
+    except Exception as exc:
+        # 표본 저장 실패가 요청/태스크 결과에 영향을 주지 않도록 기록만 함
+        logger.warning("profile sample for %s not saved: %s", name, exc)
+
+
+def metric_key(kind, name, field):
+    return f'laundry:metrics:{kind}:{name}:{field}'
+
+
+class _Metrics:
+    """프로세스 안의 누적값. flush() 때 공유 캐시의 카운터에 더하고 비웁니다."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(int)
+        self.flushed_at = time.monotonic()
+
+    def add(self, kind, name, duration, measurement, failed):
+        bucket = next((i for i, bound in enumerate(BUCKETS) if duration <= bound), None)
+        with self.lock:
+            series = (kind, name)
+            self.pending[series, 'count'] += 1
+            self.pending[series, 'failures'] += int(failed)
+            self.pending[series, 'duration_us'] += int(duration * 1e6)
+            self.pending[series, 'queries'] += measurement.queries
+            self.pending[series, 'db_us'] += int(measurement.db_seconds * 1e6)
+            self.pending[series, 'cache_hits'] += measurement.cache_hits
+            self.pending[series, 'cache_misses'] += measurement.cache_misses
+            if bucket is not None:
+                self.pending[series, f'bucket_{bucket}'] += 1
+
+    def flush(self, force=False):
+        with self.lock:
+            if not self.pending or (not force and time.monotonic() - self.flushed_at < settings.PROFILING_FLUSH_INTERVAL):
+                return
+            pending, self.pending = self.pending, defaultdict(int)
+            self.flushed_at = time.monotonic()
+        try:
+            # 처음 보는 이름만 목록에 추가 (동시에 추가하다 빠진 이름도 다음 flush 때 다시 들어감)
+            names = cache.get(NAMES_KEY) or []
+            seen = {f'{kind}:{name}' for (kind, name), _ in pending}
+            if not seen <= set(names):
+                cache.set(NAMES_KEY, sorted(seen | set(names)), None)
+            for ((kind, name), field), value in pending.items():
+                if not value:
+                    continue
+                key = metric_key(kind, name, field)
+                try:
+                    cache.incr(key, value)
+                except ValueError:
+                    if not cache.add(key, value, None):
+                        cache.incr(key, value)
+        except Exception as exc:
+            logger.warning("profiling metrics flush failed: %s", exc)
+
+
+_metrics = _Metrics()
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics():
+    """공유 캐시의 누적값을 Prometheus 텍스트 형식(0.0.4)으로 만듭니다."""
+    _metrics.flush(force=True)
+    series = [name.split(':', 1) for name in cache.get(NAMES_KEY) or []]
+    values = cache.get_many([metric_key(kind, name, field) for kind, name in series for field in FIELDS])
+
+    def value(kind, name, field):
+        return values.get(metric_key(kind, name, field), 0)
+
+    lines = []
+    for kind, label in LABELS.items():
+        names = sorted(name for k, name in series if k == kind)
+        if not names:
+            continue
+        prefix = f'laundry_{kind}'
+        lines += [
+            f'# HELP {prefix}_duration_seconds Wall time per {kind}.',
+            f'# TYPE {prefix}_duration_seconds histogram',
+        ]
+        for name in names:
+            labels = f'{label}="{_label(name)}"'
+            cumulative = 0
+            for i, bound in enumerate(BUCKETS):
+                cumulative += value(kind, name, f'bucket_{i}')
+                lines.append(f'{prefix}_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_duration_seconds_bucket{{{labels},le="+Inf"}} {value(kind, name, "count")}')
+            lines.append(f'{prefix}_duration_seconds_sum{{{labels}}} {value(kind, name, "duration_us") / 1e6}')
+            lines.append(f'{prefix}_duration_seconds_count{{{labels}}} {value(kind, name, "count")}')
+        for metric, field, scale, help_text in (
+            ('failures_total', 'failures', 1, f'Failed {kind}s (HTTP 5xx or exception).'),
+            ('db_queries_total', 'queries', 1, f'Database queries run by {kind}s.'),
+            ('db_seconds_total', 'db_us', 1e6, f'Time spent in database queries by {kind}s.'),
+            ('cache_hits_total', 'cache_hits', 1, f'Cache hits during {kind}s.'),
+            ('cache_misses_total', 'cache_misses', 1, f'Cache misses during {kind}s.'),
+        ):
+            lines += [f'# HELP {prefix}_{metric} {help_text}', f'# TYPE {prefix}_{metric} counter']
+            for name in names:
+                total = value(kind, name, field)
+                lines.append(f'{prefix}_{metric}{{{label}="{_label(name)}"}} {total / scale if scale != 1 else total}')
+    return '\n'.join(lines) + '\n'
+
+
+class ProfilingMiddleware:
+    """laundry 앱 URL 로 들어온 요청을 측정합니다. (다른 앱 요청과 metrics/ 자체는 측정만 하고 버림)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start()
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            self._finish(token, request, response)
+
+    async def __acall__(self, request):
+        token = start()
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            # 스트리밍 응답(SSE 등)은 첫 응답을 돌려줄 때까지의 시간만 잽니다.
+            measurement = stop(token)
+            if self._profiled(request):
+                await sync_to_async(self._record)(measurement, request, response)
+
+    def _finish(self, token, request, response):
+        measurement = stop(token)
+        if self._profiled(request):
+            self._record(measurement, request, response)
+
+    def _profiled(self, request):
+        match = request.resolver_match
+        return match is not None and match.view_name.startswith('laundry:') and match.view_name != 'laundry:metrics'
+
+    def _record(self, measurement, request, response):
+        status = response.status_code if response is not None else 500
+        record(
+            measurement, 'request', request.resolver_match.view_name,
+            f'{request.method} {request.path}', status, status >= 500,
+        )
+
+
+# ── Celery ──
+
+_task_tokens = {}
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    if task.name.startswith('laundry.'):
+        _task_tokens[task_id] = start()
+
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    token = _task_tokens.pop(task_id, None)
+    if token is not None:
+        record(stop(token), 'task', task.name, task_id or '', state or '', state not in (None, 'SUCCESS'))
+
+
+def install():
+    """모든 DB 연결에 쿼리 측정을 걸고 Celery 태스크 시그널을 연결합니다. (LaundryConfig.ready)"""
+    from celery.signals import task_postrun, task_prerun
+
+    connection_created.connect(_instrument, dispatch_uid='laundry.profiling')
+    for connection in connections.all(initialized_only=True):
+        _instrument(connection)
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid='laundry.profiling.prerun')
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid='laundry.profiling.postrun')
@@ -0,0 +1,152 @@
+# laundry/promotion.py
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .availability import availability
+from . import occupancy
+from .booking import close_reservation
+from .models import Machine, Reservation, UsageHistory, WaitList
+from .state import machines_state_changed
+
+
+def promotion_key(wait_id):
+    return f'promotion:{wait_id}'
+
+
+def promote_waiters(machine_ids, now=None):
+    """
+    비워진 기기들의 대기열 맨 앞 사용자를 한 번에 예약으로 승격하고, 만든 예약 목록을 반환합니다.
+    기기별 대기열과 같은 동/종류의 통합 대기열 중 먼저 대기한 사용자가 기기를 받습니다.
+
+    - 기기 행을 SELECT ... FOR UPDATE 로 잠근 뒤 겹침을 확인하므로, 동시에 들어온 예약 생성이나
+      다른 승격 작업이 같은 기기를 겹쳐 배정하지 않습니다.
+    - 대기 행은 SELECT ... FOR UPDATE SKIP LOCKED 로 잠가, 동시에 도는 다른 승격 작업이
+      같은 사용자를 두 번 승격하지 않습니다. (이미 잠긴 대기 행은 건너뜀)
+    - 승격 예약은 offered 상태로 PROMOTION_CLAIM_WINDOW 안에 사용자가 확인(claim)해야 하며,
+      기한이 지나면 sweep_reservations 가 취소하고 다음 대기자를 승격합니다.
+    - 승격된 사용자의 같은 종류 다른 대기 행도 함께 지웁니다.
+    - 예약과 대기 행 삭제는 bulk_create / 한 번의 DELETE 로 처리합니다.
+    """
+    machine_ids = set(machine_ids)
+    if not machine_ids:
+        return []
+    now = now or timezone.now()
+    end = now + settings.PROMOTION_DURATION
+    deadline = now + settings.PROMOTION_CLAIM_WINDOW
+
+    with transaction.atomic():
+        # create_reservation 과 같이 기기 행을 먼저 잠가 겹침 확인과 예약 생성을 직렬화합니다.
+        # (id 순으로 잠가 동시에 도는 승격끼리 교착되지 않음) 잠근 뒤에 읽어야 그 사이 커밋된 예약이 보입니다.
+        machines = list(
+            Machine.objects.select_for_update().filter(id__in=machine_ids)
+            .order_by('id').values_list('id', 'building_id', 'machine_type')
+        )
+        # 승격 구간과 겹치는 예약이 이미 있는 기기는 이번에는 건너뜁니다.
+        busy = set(Reservation.objects.live().filter(
+            machine_id__in=machine_ids, start_time__lt=end, end_time__gt=now,
+        ).values_list('machine_id', flat=True))
+        free = [machine for machine in machines if machine[0] not in busy]
+        if not free:
+            return []
+
+        # 기기별 대기열과, 그 기기가 속한 동/종류의 통합 대기열을 함께 읽습니다.
+        waiters = (
+            WaitList.objects
+            .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            .filter(
+                Q(machine_id__in=[machine_id for machine_id, _, _ in free])
+                | Q(
+                    machine__isnull=True,
+                    building_id__in={building_id for _, building_id, _ in free},
+                    machine_type__in={machine_type for _, _, machine_type in free},
+                )
+            )
+            .order_by('created_at', 'id')
+        )
+        queues = defaultdict(deque)
+        for wait in waiters:
+            queues[wait.machine_id or (wait.building_id, wait.machine_type)].append(wait)
+
+        # 기기마다 두 대기열 중 먼저 온 사람을 고르고, 한 사람은 한 번만 승격합니다.
+        heads = {}
+        promoted_users = set()
+        promoted_types = defaultdict(set)
+        for machine_id, building_id, machine_type in free:
+            candidates = []
+            for queue in (queues[machine_id], queues[(building_id, machine_type)]):
+                while queue and queue[0].user_id in promoted_users:
+                    queue.popleft()
+                if queue:
+                    candidates.append(queue)
+            if not candidates:
+                continue
+            wait = min(candidates, key=lambda q: (q[0].created_at, q[0].id)).popleft()
+            heads[machine_id] = wait
+            promoted_users.add(wait.user_id)
+            promoted_types[machine_type].add(wait.user_id)
+        if not heads:
+            return []
+
+        Reservation.objects.bulk_create([
+            Reservation(
+                user_id=wait.user_id,
+                machine_id=machine_id,
+                start_time=now,
+                end_time=end,
+                status=Reservation.OFFERED,
+                claim_deadline=deadline,
+                idempotency_key=promotion_key(wait.id),
+            )
+            for machine_id, wait in heads.items()
+        ])
+        # 승격된 사용자는 같은 종류의 다른 대기열(다른 기기, 통합 대기열)에서도 빠집니다.
+        # 남겨 두면 이미 기기를 받은 사용자가 다른 사람의 순번/예상 대기 시간을 늘리고 또 승격됩니다.
+        leaving = Q(id__in=[wait.id for wait in heads.values()])
+        for machine_type, user_ids in promoted_types.items():
+            leaving |= Q(user_id__in=user_ids) & (
+                Q(machine__machine_type=machine_type) | Q(machine__isnull=True, machine_type=machine_type)
+            )
+        WaitList.objects.filter(leaving).delete()
+        occupancy.sync(list(heads), now)
+
+        # MySQL 은 bulk_create 후 pk 를 돌려주지 않으므로 승격 키로 다시 읽습니다.
+        promoted = list(Reservation.objects.select_related('machine').filter(
+            idempotency_key__in=[promotion_key(wait.id) for wait in heads.values()]
+        ))
+
+        # bulk_create 는 post_save 시그널을 보내지 않으므로 인덱스/캐시를 직접 갱신합니다.
+        transaction.on_commit(lambda: [availability.add(r) for r in promoted])
+        machines_state_changed([reservation.machine for reservation in promoted])
+
+    return promoted
+
+
+def expire_offers(reservation_ids):
+    """
+    확인 기한이 지난 승격 예약을 취소하고, 비워진 기기 id 목록을 반환합니다.
+    offered 상태인 예약만 취소하므로 그 사이 확인된 예약은 그대로 남습니다.
+    """
+    machine_ids = set()
+    for reservation_id in reservation_ids:
+        reservation = close_reservation(
+            reservation_id, Reservation.CANCELLED,
+            from_statuses=(Reservation.OFFERED,), outcome=UsageHistory.EXPIRED,
+        )
+        if reservation:
+            machine_ids.add(reservation.machine_id)
+    return machine_ids
+
+
+def claim_offer(reservation_id, user, now=None):
+    """승격 예약을 기한 안에 확인하면 일반 예약(scheduled)으로 바꿉니다. 성공 여부를 반환합니다."""
+    now = now or timezone.now()
+    return bool(Reservation.objects.filter(
+        id=reservation_id,
+        user=user,
+        status=Reservation.OFFERED,
+        claim_deadline__gt=now,
+    ).update(status=Reservation.SCHEDULED, claim_deadline=None))
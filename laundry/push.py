@@ -0,0 +1,136 @@
+# laundry/push.py
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from py_vapid import Vapid
+from pywebpush import WebPusher, WebPushException
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 구독이 만료/해지되었음을 뜻하는 응답 코드. 그 외 실패는 일시적인 것으로 보고 구독을 유지합니다.
+GONE_STATUSES = (404, 410)
+
+
+def push_origin(endpoint):
+    url = urlparse(endpoint)
+    return f'{url.scheme}://{url.netloc}'
+
+
+class PushDispatcher:
+    """
+    웹푸시를 묶음 단위로 동시에 보냅니다.
+    - 스레드 풀 크기(max_workers)로 동시 전송 수를 제한합니다.
+    - 푸시 서비스 origin 마다 requests.Session 을 두어 HTTP 연결을 재사용합니다.
+    - VAPID JWT 헤더는 audience(origin)별로 만료 직전까지 캐시합니다.
+    """
+
+    # VAPID 토큰 유효 시간과, 만료 전에 미리 새로 만드는 여유 시간(초)
+    VAPID_TTL = 12 * 60 * 60
+    VAPID_REFRESH_MARGIN = 5 * 60
+
+    def __init__(self, private_key, claims_sub, max_workers=8, timeout=10, ttl=0):
+        self._vapid = Vapid.from_string(private_key=private_key)
+        self._claims_sub = claims_sub
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.ttl = ttl
+        self._sessions = {}
+        self._headers = {}
+        self._lock = threading.Lock()
+
+    def _session(self, origin):
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount(origin, adapter)
+                self._sessions[origin] = session
+            return session
+
+    def _vapid_headers(self, origin):
+        now = int(time.time())
+        with self._lock:
+            cached = self._headers.get(origin)
+            if cached and cached[0] - self.VAPID_REFRESH_MARGIN > now:
+                return cached[1]
+            exp = now + self.VAPID_TTL
+            headers = self._vapid.sign({'sub': self._claims_sub, 'aud': origin, 'exp': exp})
+            self._headers[origin] = (exp, headers)
+            return headers
+
+    def _send_one(self, subscription_info, data):
+        origin = push_origin(subscription_info['endpoint'])
+        try:
+            response = WebPusher(subscription_info, requests_session=self._session(origin)).send(
+                data,
+                dict(self._vapid_headers(origin)),
+                ttl=self.ttl,
+                timeout=self.timeout,
+            )
+            return response.status_code
+        except (requests.RequestException, WebPushException, ValueError) as exc:
+            logger.warning("web push to %s failed: %s", origin, exc)
+            return None
+
+    def send_all(self, messages):
+        """
+        messages: (key, subscription_info, data) 목록
+        반환값: key 별 HTTP 상태 코드 (네트워크 오류 등은 None)
+        """
+        messages = list(messages)
+        if not messages:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(messages))) as pool:
+            statuses = pool.map(lambda m: self._send_one(m[1], m[2]), messages)
+            return {key: status for (key, _, _), status in zip(messages, statuses)}
+
+
+_dispatcher = None
+
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = PushDispatcher(
+            settings.VAPID_PRIVATE_KEY,
+            settings.VAPID_CLAIMS_SUB,
+            max_workers=settings.WEBPUSH_MAX_WORKERS,
+            timeout=settings.WEBPUSH_TIMEOUT,
+        )
+    return _dispatcher
+
+
+def subscription_info(sub):
+    return {
+        "endpoint": sub.endpoint,
+        "keys": {"p256dh": sub.p256dh_key, "auth": sub.auth_key},
+    }
+
+
+def deliver(notifications, dispatcher=None):
+    """
+    notifications: (PushSubscription, payload dict) 목록
+    한 번에 동시 전송하고, 404/410 을 받은 구독만 일괄 삭제합니다.
+    """
+    from .models import PushSubscription
+
+    notifications = list(notifications)
+    if not notifications:
+        return {}
+    dispatcher = dispatcher or get_dispatcher()
+    statuses = dispatcher.send_all(
+        (sub.id, subscription_info(sub), json.dumps(payload))
+        for sub, payload in notifications
+    )
+    gone = [sub_id for sub_id, status in statuses.items() if status in GONE_STATUSES]
+    if gone:
+        PushSubscription.objects.filter(id__in=gone).delete()
+    return statuses
@@ -0,0 +1,77 @@
+# laundry/seeding.py
+"""
+초기 데이터/합성 데이터 적재 도구 (seed_data, generate_campus 관리 명령, 사용자 일괄 등록).
+
+행을 생성기로 만들어 batch_size 개씩 bulk_create 하므로 적재량과 상관없이 메모리 사용이 일정하고,
+자연 키(동 이름, (동, 기기 이름), 학번 등)가 이미 있는 행은 건너뛰어 여러 번 실행해도 중복되지 않습니다.
+bulk_create 는 save() 시그널을 보내지 않으므로 프로필/상태 버전 등 시그널이 하던 일은 여기서 직접 합니다.
+"""
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Building, Machine, Profile, User
+from .state import machine_set_changed
+
+
+def batched(iterable, size):
+    """iterable 을 size 개씩 끊어 list 로 돌려줍니다. 전체를 한 번에 메모리에 올리지 않습니다."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def ensure_machines(config):
+    """
+    {동 이름: {'washers': n, 'dryers': m}} 대로 동과 기기(W1.., D1..)를 만듭니다.
+    이미 있는 동/기기는 그대로 두고 빠진 것만 추가하며, 추가한 기기 수를 반환합니다.
+    """
+    Building.objects.bulk_create([Building(name=name) for name in config], ignore_conflicts=True)
+    buildings = dict(Building.objects.filter(name__in=list(config)).values_list('name', 'id'))
+    existing = set(Machine.objects.filter(building_id__in=buildings.values()).values_list('building_id', 'name'))
+
+    machines = []
+    for name, counts in config.items():
+        building_id = buildings[name]
+        for prefix, machine_type, count in (('W', 'washer', counts['washers']), ('D', 'dryer', counts['dryers'])):
+            for i in range(1, count + 1):
+                if (building_id, f'{prefix}{i}') not in existing:
+                    machines.append(Machine(building_id=building_id, name=f'{prefix}{i}', machine_type=machine_type))
+
+    with transaction.atomic():
+        Machine.objects.bulk_create(machines, batch_size=1000)
+        for building_id in {machine.building_id for machine in machines}:
+            machine_set_changed(building_id)
+    return len(machines)
+
+
+def insert_batch(rows):
+    """
+    (User, department) 목록을 넣고 프로필을 만듭니다. 학번이 이미 있는 사용자는 건드리지 않습니다.
+    ({학번: id}, 새로 만든 수, 이미 있던 수) 를 반환합니다. username 이 겹쳐 들어가지 못한 행은 ids 에 없습니다.
+    """
+    student_ids = [user.student_id for user, _ in rows]
+    with transaction.atomic():
+        existing = set(User.objects.filter(student_id__in=student_ids).values_list('student_id', flat=True))
+        new = [(user, department) for user, department in rows if user.student_id not in existing]
+        User.objects.bulk_create([user for user, _ in new], ignore_conflicts=True)
+        # MySQL 은 bulk_create 후 pk 를 돌려주지 않으므로 학번으로 다시 읽음
+        ids = dict(User.objects.filter(student_id__in=student_ids).values_list('student_id', 'id'))
+        created = [(user, department) for user, department in new if user.student_id in ids]
+        Profile.objects.bulk_create([
+            Profile(user_id=ids[user.student_id], student_id=user.student_id, department=department)
+            for user, department in created
+        ], ignore_conflicts=True)
+    return ids, len(created), len(rows) - len(new)
+
+
+def bulk_users(users, batch_size, department=''):
+    """
+    User 생성기를 batch_size 개씩 넣고 (학번이 이미 있으면 건너뜀) 프로필도 함께 만듭니다.
+    넣은(또는 이미 있던) 사용자 id 를 입력 순서대로 하나씩 돌려줍니다.
+    """
+    for batch in batched(users, batch_size):
+        ids, _, _ = insert_batch([(user, department) for user in batch])
+        for user in batch:
+            if user.student_id in ids:
+                yield ids[user.student_id]
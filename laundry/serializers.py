@@ -1,18 +1,40 @@
 from rest_framework import serializers
 from django.db.models import Count, Q
+from django.utils import timezone
 from .models import Building, Machine, Reservation, WaitList, PushSubscription
 
 class BuildingCountSerializer(serializers.ModelSerializer):
-    washer_count = serializers.IntegerField(read_only=True)
-    dryer_count  = serializers.IntegerField(read_only=True)
+    """
+    Building.objects.with_machine_counts() 로 집계된 queryset 전용 직렬화기
+    """
+    total_count    = serializers.IntegerField(read_only=True)
+    in_use_count   = serializers.IntegerField(read_only=True)
+    washer_count   = serializers.IntegerField(read_only=True)
+    dryer_count    = serializers.IntegerField(read_only=True)
+    waitlist_count = serializers.IntegerField(read_only=True)
+    analytics      = serializers.SerializerMethodField()
 
     class Meta:
         model = Building
-        fields = ['id', 'name', 'washer_count', 'dryer_count']
+        fields = ['id', 'name', 'total_count', 'in_use_count', 'washer_count', 'dryer_count', 'waitlist_count', 'analytics']
+
+    def get_analytics(self, obj):
+        # context['analytics'] 에 analytics.building_analytics() 결과를 넘긴 경우에만 요약을 붙임
+        result = self.context.get('analytics', {}).get(obj.id)
+        if result is None:
+            return None
+        now = timezone.localtime()
+        return {
+            'machine_type': result['machine_type'],
+            'occupancy_now': result['occupancy'][now.weekday()][now.hour],
+            'typical_queue_length': result['typical_queue_length'],
+            'best_time': result['best_time'],
+        }
 
 
 class MachineSerializer(serializers.ModelSerializer):
     wait_count    = serializers.SerializerMethodField()
+    is_in_use     = serializers.SerializerMethodField()
     building_name = serializers.CharField(source='building.name', read_only=True)
 
     class Meta:
@@ -24,14 +46,21 @@ class MachineSerializer(serializers.ModelSerializer):
             'name',
             'machine_type',
             'is_in_use',
-            'description',
             'wait_count',
         ]
 
     def get_wait_count(self, obj):
-        # WaitList 모델의 related_name='waitlist_set' 으로 접근
+        # Machine.objects.with_wait_count() 로 집계된 값을 우선 사용
+        if hasattr(obj, 'wait_count'):
+            return obj.wait_count
         return obj.waitlist_set.count()
 
+    def get_is_in_use(self, obj):
+        # Machine.objects.with_occupancy() 로 계산한 진행 중 예약 여부를 우선 사용
+        if hasattr(obj, 'occupied'):
+            return obj.occupied
+        return obj.is_in_use
+
 
 class WaitListSerializer(serializers.ModelSerializer):
     user_id       = serializers.CharField(source='user.student_id', read_only=True)
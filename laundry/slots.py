@@ -0,0 +1,171 @@
+# laundry/slots.py
+"""
+예약 슬롯 그리드 (api/buildings/<id>/slots/, 슬롯 id 예약).
+
+하루를 SLOT_MINUTES 분 단위 슬롯으로 나누고, 동/종류의 기기마다 비어 있는 슬롯을
+비트맵(base64) 또는 빈 구간 목록(RLE: [시작 오프셋, 길이])으로 돌려줍니다.
+슬롯 id 는 1970-01-01 UTC 부터 센 슬롯 번호라 시간대와 상관없이 정수 연산만으로 시각을 구할 수 있고,
+예약 요청은 문자열 시각 대신 (기기, 슬롯 id, 슬롯 수) 를 보냅니다.
+
+그리드는 가용성 인덱스(availability)의 기기 일정을 한 번의 쿼리로 새로 읽어 기기마다 한 번씩 훑어 만들고,
+기기 상태 버전(machine_state_version)과 현재 슬롯을 키로 캐시하므로 예약이 바뀌거나 슬롯이 지나면 새로 계산합니다.
+"""
+import base64
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .availability import availability
+from .machine_cache import machine_state_version
+from .models import Machine
+from .profiling import count_cache
+
+ENCODINGS = ('rle', 'bitmap')
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def slot_seconds():
+    return settings.SLOT_MINUTES * 60
+
+
+def _slot_length():
+    return timedelta(seconds=slot_seconds())
+
+
+def slot_start(slot_id):
+    """슬롯 id 의 시작 시각 (aware, UTC)"""
+    return EPOCH + slot_id * _slot_length()
+
+
+def slot_of(moment):
+    """moment 가 속한 슬롯 id"""
+    return (moment - EPOCH) // _slot_length()
+
+
+def slot_at_or_after(moment):
+    """moment 이후(같은 시각 포함)에 시작하는 첫 슬롯 id"""
+    return -((EPOCH - moment) // _slot_length())
+
+
+def day_slots(day):
+    """현지 날짜 day 의 (첫 슬롯 id, 슬롯 수). 자정이 슬롯 경계가 아니면 자정 이후 첫 슬롯부터 셉니다."""
+    tz = timezone.get_current_timezone()
+    midnight = timezone.make_aware(datetime.combine(day, time.min), tz)
+    next_midnight = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+    first = slot_at_or_after(midnight)
+    return first, slot_at_or_after(next_midnight) - first
+
+
+def free_bits(intervals, first_slot, count, now):
+    """
+    예약 구간들로 슬롯별 빈 여부(bytearray, 1=빈 슬롯)를 만듭니다.
+    끝난 슬롯은 비어 있지 않은 것으로 보고, 진행 중인 슬롯은 남은 시간 [now, 슬롯 끝) 만 봅니다.
+    """
+    size = slot_seconds()
+    base = first_slot * size
+    now_s = (now - EPOCH).total_seconds()
+    past = min(count, max(0, int((now_s - base) // size)))
+    bits = bytearray([0]) * past + bytearray([1]) * (count - past)
+    for start, end in intervals:
+        start_s = max((start - EPOCH).total_seconds(), now_s) - base
+        end_s = (end - EPOCH).total_seconds() - base
+        lo = max(past, int(start_s // size))
+        hi = min(count, -int(-end_s // size))
+        if lo < hi:
+            bits[lo:hi] = bytes(hi - lo)
+    return bits
+
+
+def encode_rle(bits):
+    """빈 슬롯 구간 목록 [[시작 오프셋, 길이], ...]"""
+    runs, start = [], None
+    for i, free in enumerate(bits):
+        if free and start is None:
+            start = i
+        elif not free and start is not None:
+            runs.append([start, i - start])
+            start = None
+    if start is not None:
+        runs.append([start, len(bits) - start])
+    return runs
+
+
+def encode_bitmap(bits):
+    """슬롯 i 가 비어 있으면 i 번째 비트(바이트마다 상위 비트부터)가 1 인 base64 문자열"""
+    packed = bytearray((len(bits) + 7) // 8)
+    for i, free in enumerate(bits):
+        if free:
+            packed[i >> 3] |= 0x80 >> (i & 7)
+    return base64.b64encode(bytes(packed)).decode('ascii')
+
+
+def slot_grid_cache_key(building_id, machine_type, day, encoding, version, current_slot):
+    return f'laundry:slots:{building_id}:{machine_type}:{day.isoformat()}:{encoding}:{version}:{current_slot}'
+
+
+def building_slot_grid(building_id, machine_type, day, encoding='rle'):
+    """동/종류의 기기별 빈 슬롯 그리드. 캐시에 없으면 가용성 인덱스를 새로 읽어 계산합니다."""
+    now = timezone.now()
+    key = slot_grid_cache_key(
+        building_id, machine_type, day, encoding, machine_state_version(building_id), slot_of(now)
+    )
+    grid = cache.get(key)
+    count_cache(hits=int(grid is not None), misses=int(grid is None))
+    if grid is None:
+        grid = _compute_grid(building_id, machine_type, day, encoding, now)
+        cache.set(key, grid, settings.MACHINE_CACHE_TTL)
+    return grid
+
+
+def _compute_grid(building_id, machine_type, day, encoding, now):
+    first_slot, count = day_slots(day)
+    window_start, window_end = slot_start(first_slot), slot_start(first_slot + count)
+    machines = list(
+        Machine.objects.filter(building_id=building_id, machine_type=machine_type)
+        .order_by('name').values_list('id', 'name')
+    )
+    # 다른 프로세스에서 생긴 예약도 반영되도록 이 동 기기들의 일정을 한 번에 다시 읽음
+    availability.reload_many([machine_id for machine_id, _ in machines])
+    encode = encode_bitmap if encoding == 'bitmap' else encode_rle
+    return {
+        'building_id': building_id,
+        'type': machine_type,
+        'date': day.isoformat(),
+        'slot_minutes': settings.SLOT_MINUTES,
+        'first_slot': first_slot,
+        'slots': count,
+        'default_slots': settings.BOOKING_DEFAULT_SLOTS,
+        'encoding': encoding,
+        'machines': [
+            {
+                'id': machine_id,
+                'name': name,
+                'free': encode(free_bits(
+                    availability.intervals(machine_id, window_start, window_end), first_slot, count, now
+                )),
+            }
+            for machine_id, name in machines
+        ],
+    }
+
+
+def bookable_days(today):
+    """슬롯 그리드를 볼 수 있는 현지 날짜 범위 (오늘, BOOKING_HORIZON 이 끝나는 날)"""
+    return today, today + settings.BOOKING_HORIZON
+
+
+def slot_booking_window(slot_id, slot_count, now):
+    """
+    슬롯 id 예약의 (시작, 끝) 을 구합니다. 진행 중인 슬롯이면 지금부터 시작하며,
+    이미 끝난 슬롯, BOOKING_HORIZON 이후의 슬롯이거나 슬롯 수가 범위를 벗어나면 ValueError
+    """
+    if not 1 <= slot_count <= settings.BOOKING_MAX_SLOTS:
+        raise ValueError(f'슬롯 수는 1~{settings.BOOKING_MAX_SLOTS} 사이여야 합니다.')
+    # 시각으로 바꾸기 전에 정수 범위를 먼저 확인 (아주 큰 id 는 datetime 범위를 넘어 OverflowError)
+    if slot_id < slot_of(now):
+        raise ValueError('이미 지난 슬롯입니다.')
+    if slot_id >= slot_of(now + settings.BOOKING_HORIZON):
+        raise ValueError(f'{settings.BOOKING_HORIZON.days}일 이후의 슬롯은 예약할 수 없습니다.')
+    return max(slot_start(slot_id), now), slot_start(slot_id + slot_count)
@@ -0,0 +1,79 @@
+# laundry/state.py
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .events import publish_machine_event
+from .machine_cache import invalidate_machine_states
+from .models import Building, Machine
+from .serializers import MachineSerializer
+
+
+def bump_state_versions(machines):
+    """
+    기기들이 속한 동의 상태 버전을 올리고 각 기기에 새 버전을 적습니다.
+    동 행을 UPDATE 로 잠그므로 같은 동의 변경은 버전 순서대로 커밋되어, 어떤 버전을 본 클라이언트가
+    그보다 낮은 버전의 변경을 나중에 놓치는 일이 없습니다.
+    """
+    with transaction.atomic():
+        Building.objects.filter(pk__in={machine.building_id for machine in machines}).update(
+            state_version=F('state_version') + 1
+        )
+        Machine.objects.filter(pk__in=[machine.pk for machine in machines]).update(state_version=Subquery(
+            Building.objects.filter(pk=OuterRef('building_id')).values('state_version')[:1]
+        ))
+
+
+def machine_set_changed(building_id):
+    """기기가 추가/삭제되었을 때 호출합니다. 이전 버전을 가진 클라이언트는 전체 목록을 다시 받습니다."""
+    with transaction.atomic():
+        Building.objects.filter(pk=building_id).update(state_version=F('state_version') + 1)
+        Building.objects.filter(pk=building_id).update(snapshot_version=F('state_version'))
+    invalidate_machine_states(building_id)
+
+
+def machines_state_changed(machines):
+    """
+    예약 시작/종료/취소, 대기열 변경 등으로 기기 상태가 바뀌었을 때 호출합니다.
+    기기 상태 버전을 올리고, 기기 상태 캐시를 비우고, 실시간 구독자에게 변경 이벤트를 보냅니다.
+    """
+    machines = list(machines)
+    if not machines:
+        return
+    bump_state_versions(machines)
+    for building_id in {machine.building_id for machine in machines}:
+        invalidate_machine_states(building_id)
+    for machine in machines:
+        publish_machine_event(machine.id)
+
+
+def machine_state_changed(machine):
+    machines_state_changed([machine])
+
+
+def machine_state_delta(building, since, machine_type=None):
+    """
+    since 버전 이후 상태가 바뀐 기기만 돌려줍니다. since 가 0 이거나, 기기 추가/삭제 이전이거나,
+    현재 버전보다 크면(서버 데이터 초기화 등) 전체 목록(full=True)을 돌려줍니다.
+    building 은 방금 읽은 Building 이어야 하며, 기기보다 버전을 먼저 읽으므로 응답 버전 이후의 변경은
+    다음 조회에서 (중복될 수는 있어도) 빠지지 않습니다.
+    """
+    full = since < building.snapshot_version or since > building.state_version
+    now = timezone.now()
+    machines = (
+        Machine.objects.with_live_state(now).with_occupancy(now)
+        .filter(building=building).order_by('name')
+    )
+    if machine_type:
+        machines = machines.filter(machine_type=machine_type)
+    if not full:
+        machines = machines.filter(state_version__gt=since)
+    return {
+        'building_id': building.id,
+        'version': building.state_version,
+        'full': full,
+        'machines': [
+            {**MachineSerializer(machine).data, **machine.live_state(now), 'get_image_url': machine.get_image_url}
+            for machine in machines
+        ],
+    }
@@ -2,59 +2,143 @@
 from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
-from .models import Reservation, Machine, WaitList, PushSubscription
+from .models import Machine, Reservation, PushSubscription
+from . import analytics, occupancy, usage
+from .state import machine_state_changed, machines_state_changed
+from .push import deliver
+from .promotion import expire_offers, promote_waiters
+from .booking import close_reservation
+from .archive import archive_closed_reservations
 from django.conf import settings
-import json
-from pywebpush import webpush, WebPushException
+
+# 알림 단계: (reminders_sent 값, 라벨, 시작 시각 기준 발송 시점)
+REMINDER_STAGES = (
+    (2, '시작 시각', timedelta()),
+    (1, '10분 전', timedelta(minutes=10)),
+)
 
 @shared_task
 def start_reservation_task(reservation_id):
     """
     예약 시작 시각에 호출되어 기기 사용 상태를 True로 전환합니다.
+    scheduled 상태인 예약만 active 로 바꾸므로 여러 번 호출되어도 한 번만 처리됩니다.
     """
-    try:
-        reservation = Reservation.objects.get(id=reservation_id)
-        machine = reservation.machine
-        machine.is_in_use = True
-        machine.save()
-    except Reservation.DoesNotExist:
-        pass
+    started = Reservation.objects.filter(
+        id=reservation_id, status=Reservation.SCHEDULED
+    ).update(status=Reservation.ACTIVE)
+    if not started:
+        return
+    machine = Reservation.objects.select_related('machine').get(id=reservation_id).machine
+    occupancy.sync([machine.id])
+    machine_state_changed(machine)
+
+def _end_reservation(reservation_id):
+    """예약을 사용 완료(done)로 바꾸고 기기를 비웁니다. 실제로 끝낸 경우에만 기기를 반환합니다."""
+    reservation = close_reservation(reservation_id, Reservation.DONE)
+    return reservation.machine if reservation else None
 
 @shared_task
 def end_reservation_task(reservation_id):
     """
-    예약 종료 시각에 호출되어 예약 삭제, 기기 사용 상태 False, 대기열 승격을 처리합니다.
+    예약 종료 시각에 호출되어 예약 완료 처리, 기기 사용 상태 False, 대기열 승격을 처리합니다.
+    이미 종료/취소된 예약이면 아무것도 하지 않습니다.
     """
-    try:
-        reservation = Reservation.objects.get(id=reservation_id)
-        machine = reservation.machine
-        reservation.delete()
-        machine.is_in_use = False
-        machine.save()
-    except Reservation.DoesNotExist:
-        return
+    machine = _end_reservation(reservation_id)
+    if machine:
+        promote_and_notify([machine.id])
 
-    # 대기열에서 다음 사용자 자동 승격
-    next_wait = WaitList.objects.filter(machine=machine).order_by('created_at').first()
-    if next_wait:
-        start = timezone.now()
-        end = start + timedelta(hours=1)
-        new_res = Reservation.objects.create(
-            user=next_wait.user,
-            machine=machine,
-            start_time=start,
-            end_time=end
+def promote_and_notify(machine_ids):
+    """비워진 기기들의 대기자를 한 번에 승격하고 확인 요청 알림을 보냅니다."""
+    promoted = promote_waiters(machine_ids)
+    if promoted:
+        minutes = int(settings.PROMOTION_CLAIM_WINDOW.total_seconds() // 60)
+        label = f'차례입니다. {minutes}분 안에 사용 시작을 눌러주세요'
+        send_reservation_reminders.delay([(r.id, label) for r in promoted])
+    return promoted
+
+def _due_ids(queryset, batch_size):
+    return list(queryset.order_by('pk').values_list('id', flat=True)[:batch_size])
+
+@shared_task
+def sweep_reservations():
+    """
+    celery beat 로 RESERVATION_SWEEP_INTERVAL 초마다 실행되는 예약 스케줄러입니다.
+    예약마다 ETA 태스크를 걸어두는 대신 인덱스가 걸린 시각 조건으로 처리할 예약을
+    배치 단위로 읽어 알림, 시작, 종료를 진행합니다. 각 단계는 상태 조건부 UPDATE 로
+    한 번만 적용되고, 취소된 예약은 상태가 바뀌어 있으므로 자연히 건너뜁니다.
+    """
+    now = timezone.now()
+    batch_size = settings.RESERVATION_SWEEP_BATCH
+
+    # 늦게 처리되는 예약은 가장 최근 단계의 알림만 보내도록 뒤 단계부터 처리
+    for stage, label, offset in REMINDER_STAGES:
+        due = Reservation.objects.filter(
+            status=Reservation.SCHEDULED,
+            start_time__lte=now + offset,
+            end_time__gt=now,
+            reminders_sent__lt=stage,
         )
-        next_wait.delete()
-        # 기기 상태 토글 스케줄
-        start_reservation_task.apply_async(args=[new_res.id], eta=start)
-        end_reservation_task.apply_async(args=[new_res.id], eta=end)
-        # 푸시 알림 스케줄
-        for label, offset in [('10분 전', timedelta(minutes=10)), ('시작 시각', timedelta())]:
-            eta = start - offset
-            if timezone.is_naive(eta):
-                eta = timezone.make_aware(eta, timezone.get_current_timezone())
-            send_reservation_reminder.apply_async(args=[new_res.id, label], eta=eta)
+        while ids := _due_ids(due, batch_size):
+            claimed = [
+                reservation_id for reservation_id in ids
+                if Reservation.objects.filter(
+                    id=reservation_id, reminders_sent__lt=stage
+                ).update(reminders_sent=stage)
+            ]
+            if claimed:
+                send_reservation_reminders.delay([(reservation_id, label) for reservation_id in claimed])
+            if len(ids) < batch_size:
+                break
+
+    starting = Reservation.objects.filter(
+        status=Reservation.SCHEDULED, start_time__lte=now, end_time__gt=now
+    )
+    while ids := _due_ids(starting, batch_size):
+        for reservation_id in ids:
+            start_reservation_task(reservation_id)
+        if len(ids) < batch_size:
+            break
+
+    # 확인 기한이 지난 승격 예약은 취소하고 다음 대기자에게 넘깁니다.
+    unclaimed = Reservation.objects.filter(status=Reservation.OFFERED, claim_deadline__lte=now)
+    while ids := _due_ids(unclaimed, batch_size):
+        promote_and_notify(expire_offers(ids))
+        if len(ids) < batch_size:
+            break
+
+    # 종료된 예약을 배치 단위로 정리하고, 비워진 기기들의 대기자를 한 번에 승격합니다.
+    ending = Reservation.objects.live().filter(end_time__lte=now)
+    while ids := _due_ids(ending, batch_size):
+        freed = [machine for machine in map(_end_reservation, ids) if machine]
+        promote_and_notify([machine.id for machine in freed])
+        if len(ids) < batch_size:
+            break
+
+@shared_task
+def rollup_usage():
+    """
+    celery beat 로 USAGE_ROLLUP_INTERVAL 초마다 새 사용 기록을 기기별 통계에 더하고
+    현재 대기 인원을 표본으로 남긴 뒤, 이용 분석 캐시를 무효화합니다.
+    """
+    rolled = usage.rollup()
+    usage.sample_queue_lengths()
+    analytics.bump_version()
+    return rolled
+
+@shared_task
+def archive_reservations():
+    """celery beat 로 RESERVATION_ARCHIVE_INTERVAL 초마다 오래된 종료 예약을 보관 테이블로 옮깁니다."""
+    return archive_closed_reservations()
+
+@shared_task
+def reconcile_machine_occupancy():
+    """
+    celery beat 로 MACHINE_RECONCILE_INTERVAL 초마다 모든 기기의 is_in_use 를 진행 중 예약에 맞춥니다.
+    태스크 유실 등으로 어긋난 기기만 갱신하고 상태 변경을 알립니다.
+    """
+    changed = occupancy.sync()
+    machines_state_changed(Machine.objects.filter(id__in=changed))
+    return len(changed)
 
 @shared_task
 def send_reservation_reminder(reservation_id, label):
@@ -62,32 +146,27 @@ def send_reservation_reminder(reservation_id, label):
     reservation_id에 해당하는 예약 정보를 조회하여
     label(예: '10분 전', '시작 시각') 웹푸시 알림을 전송합니다.
     """
-    try:
-        res = Reservation.objects.select_related('user', 'machine').get(id=reservation_id)
-    except Reservation.DoesNotExist:
-        return
+    send_reservation_reminders([(reservation_id, label)])
 
-    subs = PushSubscription.objects.filter(user=res.user)
-    if not subs.exists():
-        return
+@shared_task
+def send_reservation_reminders(items):
+    """
+    (reservation_id, label) 목록의 알림을 한 번에 조회해 동시에 전송합니다.
+    sweep_reservations 가 한 주기에 모은 알림을 묶어서 호출합니다.
+    """
+    labels = dict(items)
+    reservations = Reservation.objects.select_related('machine__building').filter(id__in=labels)
+    subs_by_user = {}
+    for sub in PushSubscription.objects.filter(user_id__in=[r.user_id for r in reservations]):
+        subs_by_user.setdefault(sub.user_id, []).append(sub)
+
+    notifications = []
+    for res in reservations:
+        payload = {
+            "title": "예약 알림",
+            "body": f"{res.machine.building.name}동 {res.machine.name} {labels[res.id]}",
+            "url": settings.SITE_URL + "/laundry/"
+        }
+        notifications.extend((sub, payload) for sub in subs_by_user.get(res.user_id, ()))
 
-    payload = {
-        "title": "예약 알림",
-        "body": f"{res.machine.building}동 {res.machine.name} {label}",
-        "url": settings.SITE_URL + "/laundry/"
-    }
-
-    for sub in subs:
-        try:
-            webpush(
-                subscription_info={
-                    "endpoint": sub.endpoint,
-                    "keys": {"p256dh": sub.p256dh_key, "auth": sub.auth_key}
-                },
-                data=json.dumps(payload),
-                vapid_private_key=settings.VAPID_PRIVATE_KEY,
-                vapid_claims={"sub": settings.VAPID_CLAIMS_SUB}
-            )
-        except WebPushException:
-            sub.delete()
-            continue
\ No newline at end of file
+    deliver(notifications)
@@ -0,0 +1,452 @@
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from config.celery import app as celery_app
+from laundry import booking, promotion, slots, waitlist
+from laundry.authentication import CachedTokenAuthentication, _local, forget_token, token_cache_key
+from laundry.models import Building, Machine, Reservation, User, WaitList
+
+# 운영 Redis/MySQL 대신 테스트 DB 와 프로세스 메모리 캐시만 쓰도록
+laundry_test_settings = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'laundry-tests'}},
+    WAITLIST_REDIS_URL='',
+    MACHINE_EVENTS_REDIS_URL='',
+    PROFILING_SAMPLE_RATE=0,
+    PROFILING_SLOW_MS=float('inf'),
+)
+
+
+@laundry_test_settings
+class QueryPlanTests(TestCase):
+    """예약/대기열의 자주 쓰는 쿼리가 전체 테이블 스캔으로 떨어지지 않는지 확인합니다."""
+
+    def hot_queries(self):
+        now = timezone.now()
+        return {
+            # get_remaining_time_api
+            'remaining_time': Reservation.objects.live().filter(
+                machine_id=1, start_time__lte=now, end_time__gt=now
+            ),
+            # create_reservation 겹침 확인
+            'create_reservation': Reservation.objects.live().filter(
+                machine_id=1, start_time__lt=now, end_time__gt=now
+            ),
+            # sweep_reservations 종료 대상
+            'sweep_ending': Reservation.objects.live().filter(end_time__lte=now).order_by('pk'),
+            # archive_closed_reservations
+            'archive': Reservation.objects.filter(
+                status__in=Reservation.CLOSED_STATUSES, closed_at__lt=now
+            ).order_by('closed_at', 'id'),
+            # mypage
+            'mypage': Reservation.objects.filter(user_id=1).order_by('-start_time'),
+            # list_waitlist / end_reservation_task
+            'list_waitlist': WaitList.objects.filter(machine_id=1).order_by('created_at'),
+        }
+
+    def is_full_scan(self, queryset):
+        if connection.vendor == 'sqlite':
+            plan = queryset.explain()
+            table = queryset.model._meta.db_table
+            return any(
+                line.split(' ', 3)[-1].startswith(f'SCAN {table}') and 'INDEX' not in line
+                for line in plan.splitlines()
+            ), plan
+        if connection.vendor == 'mysql':
+            plan = queryset.explain(format='json')
+            return '"access_type": "ALL"' in json.dumps(json.loads(plan)), plan
+        self.skipTest(f'지원하지 않는 DB 백엔드입니다: {connection.vendor}')
+
+    def test_hot_queries_use_an_index(self):
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(name):
+                full_scan, plan = self.is_full_scan(queryset)
+                self.assertFalse(full_scan, f'{name}: full scan\n{plan}')
+
+
+@laundry_test_settings
+class QueryCountTests(TestCase):
+    """목록 화면/API 의 쿼리 수가 보여주는 행 수에 따라 늘지 않는지 확인합니다. (N+1 방지)"""
+
+    def endpoints(self, building, machine):
+        return {
+            'get_machine_list_api': reverse('laundry:get_machine_list_api') + f'?building={building.id}',
+            'list_waitlist': reverse('laundry:list_waitlist', args=[machine.id]),
+            'mypage': reverse('laundry:mypage'),
+            'building_counts': reverse('laundry:building_counts'),
+            'building_slots_api': reverse('laundry:building_slots_api', args=[building.id]) + '?type=washer',
+        }
+
+    def seed(self, size):
+        now = timezone.now()
+        building = Building.objects.create(name=f'qc_{size}')
+        machines = [
+            Machine.objects.create(building=building, name=f'W{i}', machine_type='washer')
+            for i in range(size)
+        ]
+        users = [User.objects.create_user(f'qc_{size}_{i}', f'qc_{size}_{i}') for i in range(size)]
+        viewer = users[0]
+        for i, machine in enumerate(machines):
+            start = now + timedelta(hours=i)
+            Reservation.objects.create(user=viewer, machine=machine, start_time=start, end_time=start + timedelta(minutes=50))
+        for user in users:
+            WaitList.objects.create(user=user, machine=machines[0])
+        for machine in machines[1:]:
+            WaitList.objects.create(user=viewer, machine=machine)
+        return building, machines[0], viewer
+
+    def login(self, viewer):
+        self.client.force_login(viewer)
+        # 캐시 적중 여부에 따라 쿼리 수가 달라지지 않도록 빈 캐시에서 잼
+        cache.clear()
+
+    def test_list_endpoints_run_a_fixed_number_of_queries(self):
+        small_building, small_machine, small_viewer = self.seed(2)
+        large_building, large_machine, large_viewer = self.seed(20)
+        small = self.endpoints(small_building, small_machine)
+        large = self.endpoints(large_building, large_machine)
+        for name in small:
+            with self.subTest(name):
+                self.login(small_viewer)
+                with CaptureQueriesContext(connection) as ctx:
+                    self.assertEqual(self.client.get(small[name]).status_code, 200)
+                self.login(large_viewer)
+                with self.assertNumQueries(len(ctx)):
+                    self.assertEqual(self.client.get(large[name]).status_code, 200)
+
+
+def race(workers, target):
+    """workers 개 스레드가 동시에 target(i) 를 부르고 결과 목록을 돌려줍니다. 스레드마다 자기 DB 연결을 닫습니다."""
+    barrier = threading.Barrier(workers)
+    results = [None] * workers
+
+    def run(i):
+        try:
+            barrier.wait()
+            results[i] = target(i)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@laundry_test_settings
+class ConcurrentBookingTests(TransactionTestCase):
+    """같은 기기, 같은 시간대에 동시에 들어온 예약 중 하나만 성공하는지 확인합니다."""
+
+    workers = 16
+    rounds = 3
+
+    def setUp(self):
+        building = Building.objects.create(name='race')
+        self.machine = Machine.objects.create(building=building, name='W1', machine_type='washer')
+        self.users = [User.objects.create_user(f'race_{i}', f'race_{i}') for i in range(self.workers)]
+
+    def test_exactly_one_winner_per_slot(self):
+        for round_no in range(self.rounds):
+            start = timezone.now() + timedelta(hours=round_no + 1)
+            end = start + timedelta(minutes=50)
+
+            def attempt(i):
+                try:
+                    return booking.create_reservation(self.users[i], self.machine.id, start, end)[1]
+                except (booking.ReservationConflict, OperationalError):
+                    # OperationalError: 행 잠금이 없는 SQLite 에서 쓰기 충돌 시 발생
+                    return False
+
+            with self.subTest(round=round_no):
+                self.assertEqual(sum(race(self.workers, attempt)), 1)
+                self.assertEqual(Reservation.objects.live().filter(
+                    machine=self.machine, start_time__lt=end, end_time__gt=start,
+                ).count(), 1)
+
+
+@laundry_test_settings
+class PromotionRaceTests(TransactionTestCase):
+    """대기열 승격이 동시에 들어온 예약 생성/다른 승격과 같은 기기를 겹쳐 배정하지 않는지 확인합니다."""
+
+    rounds = 5
+
+    def setUp(self):
+        self.building = Building.objects.create(name='promotion')
+        self.booker = User.objects.create_user('booker', 'booker')
+        self.waiters = [User.objects.create_user(f'waiter_{i}', f'waiter_{i}') for i in range(2)]
+
+    def machine_with_waiters(self, name, count):
+        machine = Machine.objects.create(building=self.building, name=name, machine_type='washer')
+        for user in self.waiters[:count]:
+            WaitList.objects.create(user=user, machine=machine)
+        return machine
+
+    def live_now(self, machine):
+        now = timezone.now()
+        return Reservation.objects.live().filter(machine=machine, start_time__lte=now, end_time__gt=now).count()
+
+    def test_promotion_racing_a_booking_assigns_the_machine_once(self):
+        for round_no in range(self.rounds):
+            machine = self.machine_with_waiters(f'B{round_no}', 1)
+
+            def attempt(i):
+                try:
+                    if i == 0:
+                        return len(promotion.promote_waiters([machine.id]))
+                    now = timezone.now()
+                    return int(booking.create_reservation(self.booker, machine.id, now, now + timedelta(minutes=50))[1])
+                except (booking.ReservationConflict, OperationalError):
+                    return 0
+
+            with self.subTest(round=round_no):
+                self.assertEqual(sum(race(2, attempt)), 1)
+                self.assertEqual(self.live_now(machine), 1)
+
+    def test_concurrent_promotions_assign_the_machine_once(self):
+        for round_no in range(self.rounds):
+            machine = self.machine_with_waiters(f'P{round_no}', 2)
+
+            def attempt(i):
+                try:
+                    return len(promotion.promote_waiters([machine.id]))
+                except OperationalError:
+                    return 0
+
+            with self.subTest(round=round_no):
+                self.assertEqual(sum(race(2, attempt)), 1)
+                self.assertEqual(Reservation.objects.filter(machine=machine, status=Reservation.OFFERED).count(), 1)
+                self.assertEqual(WaitList.objects.filter(machine=machine).count(), 1)
+
+
+@laundry_test_settings
+class UserImportTests(TestCase):
+    """기숙사생 일괄 등록이 잘못된 행/파일을 500 없이 오류로 알려 주는지 확인합니다."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('import_admin', 'import_admin'))
+
+    def upload(self, content, name='users.csv'):
+        response = self.client.post(
+            reverse('laundry:import_users_api'), {'file': SimpleUploadedFile(name, content)}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_long_email_used_as_username_is_rejected_per_row(self):
+        email = 'a' * 40 + '@example.com'
+        result = self.upload(f'student_id,email,password_hash\n20240001,{email},{make_password(None)}\n'.encode())[-1]
+        self.assertTrue(result['done'])
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['errors'][0]['line'], 2)
+        self.assertIn('username', result['errors'][0]['error'])
+
+    @override_settings(USER_IMPORT_WORKERS=1)
+    def test_reimport_does_not_hash_existing_users(self):
+        content = b'student_id,username,password\n20240003,reimport,secret-pass\n'
+        self.assertEqual(self.upload(content)[-1]['created'], 1)
+        with mock.patch('laundry.user_import.make_password', wraps=make_password) as hashed:
+            result = self.upload(content)[-1]
+        self.assertEqual((result['created'], result['existing']), (0, 1))
+        self.assertNotIn(mock.call('secret-pass'), hashed.call_args_list)
+
+    def test_non_utf8_file_ends_the_stream_with_an_error(self):
+        result = self.upload('student_id,username,department\n20240002,홍길동,기계공학과\n'.encode('cp949'))[-1]
+        self.assertTrue(result['done'])
+        self.assertIn('error', result)
+        self.assertFalse(User.objects.filter(student_id='20240002').exists())
+
+
+@laundry_test_settings
+class PromotionTests(TestCase):
+    """승격된 사용자가 다른 대기열에 남아 순번을 차지하지 않는지 확인합니다."""
+
+    def test_promoted_user_leaves_other_queues_of_the_same_type(self):
+        building = Building.objects.create(name='promote')
+        washer = Machine.objects.create(building=building, name='W1', machine_type='washer')
+        other_washer = Machine.objects.create(building=building, name='W2', machine_type='washer')
+        dryer = Machine.objects.create(building=building, name='D1', machine_type='dryer')
+        user, other = (User.objects.create_user(f'promote_{i}', f'promote_{i}') for i in range(2))
+        WaitList.objects.create(user=user, machine=washer)
+        WaitList.objects.create(user=user, machine=other_washer)
+        WaitList.objects.create(user=user, building=building, machine_type='washer')
+        kept = WaitList.objects.create(user=user, machine=dryer)
+        behind = WaitList.objects.create(user=other, machine=other_washer)
+
+        self.assertEqual([r.user_id for r in promotion.promote_waiters([washer.id])], [user.id])
+        self.assertEqual(set(WaitList.objects.values_list('id', flat=True)), {kept.id, behind.id})
+        self.assertEqual(waitlist.positions([behind])[behind.id], (1, 1))
+
+    def test_declined_offer_goes_to_the_next_waiter(self):
+        # 승격 알림 태스크를 브로커 없이 바로 실행
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', eager)
+        building = Building.objects.create(name='decline')
+        machine = Machine.objects.create(building=building, name='W1', machine_type='washer')
+        first, second = (User.objects.create_user(f'decline_{i}', f'decline_{i}') for i in range(2))
+        WaitList.objects.create(user=first, machine=machine)
+        WaitList.objects.create(user=second, machine=machine)
+        [offer] = promotion.promote_waiters([machine.id])
+
+        self.client.force_login(first)
+        response = self.client.post(reverse('laundry:cancel_reservation', args=[offer.id]))
+        self.assertEqual(response.status_code, 200)
+        live = Reservation.objects.live().get(machine=machine)
+        self.assertEqual((live.user_id, live.status), (second.id, Reservation.OFFERED))
+        self.assertFalse(WaitList.objects.exists())
+
+
+@laundry_test_settings
+class IdempotencyTests(TestCase):
+    """같은 Idempotency-Key 재시도는 기존 예약을 돌려주고, 다른 내용이면 409 로 거절하는지 확인합니다."""
+
+    def setUp(self):
+        building = Building.objects.create(name='idempotency')
+        self.machine = Machine.objects.create(building=building, name='W1', machine_type='washer')
+        self.other = Machine.objects.create(building=building, name='W2', machine_type='washer')
+        self.client.force_login(User.objects.create_user('idem', 'idem'))
+        self.start = timezone.localtime() + timedelta(hours=1)
+
+    def book(self, machine, minutes=50):
+        return self.client.post(reverse('laundry:create_reservation'), {
+            'machine_id': machine.id,
+            'start_time': self.start.isoformat(),
+            'end_time': (self.start + timedelta(minutes=minutes)).isoformat(),
+        }, HTTP_IDEMPOTENCY_KEY='retry-1')
+
+    def test_replay_returns_the_same_reservation(self):
+        first, second = self.book(self.machine), self.book(self.machine)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()['reservation_id'], second.json()['reservation_id'])
+
+    def test_reused_key_with_a_different_request_is_rejected(self):
+        reservation_id = self.book(self.machine).json()['reservation_id']
+        for name, response in (('machine', self.book(self.other)), ('end', self.book(self.machine, minutes=80))):
+            with self.subTest(name):
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response.json()['reservation_id'], reservation_id)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+
+@laundry_test_settings
+class SlotBoundsTests(TestCase):
+    """BOOKING_HORIZON 밖의 슬롯/날짜/시각은 500 대신 400 으로 거절하는지 확인합니다."""
+
+    def setUp(self):
+        self.building = Building.objects.create(name='slots')
+        self.machine = Machine.objects.create(building=self.building, name='W1', machine_type='washer')
+        self.client.force_login(User.objects.create_user('slots', 'slots'))
+
+    def book(self, **data):
+        return self.client.post(reverse('laundry:create_reservation'), {'machine_id': self.machine.id, **data})
+
+    def test_out_of_range_slot_ids_are_rejected(self):
+        current = slots.slot_of(timezone.now())
+        horizon = slots.slot_of(timezone.now() + settings.BOOKING_HORIZON)
+        for slot_id in (10 ** 30, -(10 ** 30), horizon + 1, current - 1):
+            with self.subTest(slot_id):
+                self.assertEqual(self.book(slot=slot_id).status_code, 400)
+        self.assertEqual(self.book(slot=current + 1).status_code, 200)
+
+    def test_out_of_range_times_are_rejected(self):
+        far = timezone.now() + settings.BOOKING_HORIZON + timedelta(days=1)
+        soon = timezone.now() + timedelta(hours=1)
+        for start, end in (
+            ('9999-12-31T23:00:00+00:00', '9999-12-31T23:50:00+00:00'),
+            (far.isoformat(), (far + timedelta(minutes=50)).isoformat()),
+            # 가까운 시작 + 아주 먼 종료, 최대 길이를 넘는 예약
+            (soon.isoformat(), '9999-12-31T23:00:00+00:00'),
+            (soon.isoformat(), (soon + timedelta(minutes=settings.BOOKING_MAX_SLOTS * settings.SLOT_MINUTES + 1)).isoformat()),
+            ('not-a-time', 'not-a-time'),
+        ):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(self.book(start_time=start, end_time=end).status_code, 400)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_grid_dates_outside_the_horizon_are_rejected(self):
+        url = reverse('laundry:building_slots_api', args=[self.building.id])
+        today = timezone.localdate()
+        for day in ('9999-12-31', (today - timedelta(days=1)).isoformat()):
+            with self.subTest(day):
+                self.assertEqual(self.client.get(url, {'date': day}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'date': today.isoformat()}).status_code, 200)
+
+
+@laundry_test_settings
+class TokenAuthTests(TestCase):
+    """토큰 인증이 캐시된 뒤 DB 를 읽지 않고, 폐기/비활성화된 토큰은 거절하는지 확인합니다."""
+
+    def setUp(self):
+        self.building = Building.objects.create(name='token')
+        self.user = User.objects.create_user('token', 'token', 'x')
+        self.key = Token.objects.create(user=self.user).key
+        forget_token(self.key)
+        self.addCleanup(forget_token, self.key)
+        self.url = reverse('laundry:get_machine_list_api') + f'?building={self.building.id}'
+
+    def authenticates(self):
+        try:
+            CachedTokenAuthentication().authenticate_credentials(self.key)
+        except AuthenticationFailed:
+            return False
+        return True
+
+    def test_warm_lookups_do_not_query(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticates())
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                self.assertTrue(self.authenticates())
+
+    def test_shared_cache_holds_no_user_object(self):
+        self.authenticates()
+        self.assertEqual(cache.get(token_cache_key(self.key)), {'user_id': self.user.id, 'is_active': True})
+        # 다른 프로세스처럼 메모리 캐시 없이 공유 캐시만 있을 때는 사용자만 pk 로 읽음
+        _local.clear()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticates())
+
+    def test_inactive_and_revoked_tokens_are_rejected(self):
+        client = self.client_class(HTTP_AUTHORIZATION=f'Token {self.key}')
+        self.assertEqual(client.get(self.url).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.authenticates())
+        self.user.is_active = True
+        self.user.save()
+        self.assertTrue(self.authenticates())
+
+        response = client.post(reverse('laundry:revoke_token_api'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['revoked'])
+        self.assertFalse(self.authenticates())
+        self.assertIn(client.get(self.url).status_code, (401, 403))
+
+
+@laundry_test_settings
+class RemainingTimesTests(TestCase):
+    """여러 기기 남은 시간 API 가 잘못된 building/ids 를 500 대신 400 으로 거절하는지 확인합니다."""
+
+    def test_non_numeric_filters_are_rejected(self):
+        self.client.force_login(User.objects.create_user('remaining', 'remaining'))
+        url = reverse('laundry:get_remaining_times_api')
+        for query in ({'building': 'abc'}, {'ids': '1,x'}):
+            with self.subTest(query):
+                self.assertEqual(self.client.get(url, query).status_code, 400)
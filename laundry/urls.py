@@ -24,20 +24,29 @@ urlpatterns = [
     # ── 마이페이지 및 통계
     path('mypage/', views.mypage, name='mypage'),
     path('buildings/', views.building_list_with_counts, name='building_counts'),
+    path('buildings/<int:building_id>/events/', views.machine_event_stream, name='machine_events'),
 
     # ── 인증
     path('login/', auth_views.LoginView.as_view(template_name='laundry/login.html'), name='login'),
     path('login/api/', obtain_auth_token, name='api_login'),
+    path('api/token/revoke/', views.revoke_token_api, name='revoke_token_api'),
 
     # ── 예약 및 대기열
     path('reservations/create/', views.create_reservation, name='create_reservation'),
     path('reservations/cancel/<int:pk>/', views.cancel_reservation, name='cancel_reservation'),
+    path('reservations/claim/<int:pk>/', views.claim_reservation, name='claim_reservation'),
     path('waitlist/join/', views.join_waitlist, name='join_waitlist'),
+    path('waitlist/status/', views.waitlist_status, name='waitlist_status'),
     path('waitlist/<int:machine_id>/', views.list_waitlist, name='list_waitlist'),
 
     # ── API 엔드포인트
     path('api/machines/', views.get_machine_list_api, name='get_machine_list_api'),
     path('api/remaining-time/', views.get_remaining_time_api, name='get_remaining_time_api'),
+    path('api/remaining-time/bulk/', views.get_remaining_times_api, name='get_remaining_times_api'),
+    path('api/buildings/<int:building_id>/analytics/', views.building_analytics_api, name='building_analytics_api'),
+    path('api/buildings/<int:building_id>/slots/', views.building_slots_api, name='building_slots_api'),
+    path('api/users/import/', views.import_users_api, name='import_users_api'),
+    path('metrics/', views.metrics_view, name='metrics'),
 
     # ── 회원가입 및 활성화
     path('signup/', views.signup_view, name='signup'),
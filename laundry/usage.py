@@ -0,0 +1,204 @@
+# laundry/usage.py
+"""
+예약 사용 기록과 기기별 사용 통계.
+
+booking.close_reservation() 이 예약을 done/cancelled 로 바꾸는 조건부 UPDATE 와 같은 트랜잭션에서
+record() 로 UsageHistory 를 남기고,
+rollup() 이 새 기록만 읽어 기기별 요일/시간대 점유 시간(MachineUsageRollup)과
+사용 시간 분포(MachineDurationBucket)에 더합니다. sample_queue_lengths() 는 같은 주기로 현재 대기 인원을
+동/종류별 표본(QueueLengthRollup)으로 더합니다. 통계와 예상 대기 시간은 집계 테이블만 읽습니다.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import (
+    Machine, MachineDurationBucket, MachineUsageRollup, QueueLengthRollup, UsageHistory, UsageRollupState,
+    WaitList,
+)
+
+ROLLUP_NAME = 'usage'
+
+
+def record(reservations, outcome, ended_at=None):
+    """
+    종료 처리한 예약들의 사용 기록을 남깁니다. close_reservation() 이 상태를 done/cancelled 로 바꾼
+    트랜잭션 안에서 호출하므로, 상태 변경이 롤백되면 기록도 남지 않습니다.
+    """
+    ended_at = ended_at or timezone.now()
+    UsageHistory.objects.bulk_create([
+        UsageHistory(
+            reservation_id=reservation.id,
+            user_id=reservation.user_id,
+            machine_id=reservation.machine_id,
+            start_time=reservation.start_time,
+            end_time=reservation.end_time,
+            ended_at=ended_at,
+            outcome=outcome,
+        )
+        for reservation in reservations
+    ], ignore_conflicts=True)
+
+
+def hour_bins(start, end):
+    """[start, end) 구간을 현지 시각 기준 (요일, 시, 초) 조각으로 나눕니다."""
+    cursor = timezone.localtime(start)
+    end = timezone.localtime(end)
+    while cursor < end:
+        boundary = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        stop = min(boundary, end)
+        yield cursor.weekday(), cursor.hour, round((stop - cursor).total_seconds())
+        cursor = stop
+
+
+def _add_bins(occupancy, sessions):
+    keys = set(occupancy) | set(sessions)
+    existing = {
+        (row.machine_id, row.weekday, row.hour): row
+        for row in MachineUsageRollup.objects.filter(machine_id__in={key[0] for key in keys})
+    }
+    created, updated = [], []
+    for key in keys:
+        row = existing.get(key)
+        if row is None:
+            machine_id, weekday, hour = key
+            row = MachineUsageRollup(machine_id=machine_id, weekday=weekday, hour=hour)
+            created.append(row)
+        else:
+            updated.append(row)
+        row.occupied_seconds += occupancy[key]
+        row.sessions += sessions[key]
+    MachineUsageRollup.objects.bulk_update(updated, ['occupied_seconds', 'sessions'], batch_size=1000)
+    MachineUsageRollup.objects.bulk_create(created, batch_size=1000)
+
+
+def _add_buckets(durations):
+    existing = {
+        (row.machine_id, row.minutes): row
+        for row in MachineDurationBucket.objects.filter(machine_id__in={key[0] for key in durations})
+    }
+    created, updated = [], []
+    for (machine_id, minutes), count in durations.items():
+        row = existing.get((machine_id, minutes))
+        if row is None:
+            row = MachineDurationBucket(machine_id=machine_id, minutes=minutes)
+            created.append(row)
+        else:
+            updated.append(row)
+        row.count += count
+    MachineDurationBucket.objects.bulk_update(updated, ['count'], batch_size=1000)
+    MachineDurationBucket.objects.bulk_create(created, batch_size=1000)
+
+
+def rollup(batch_size=None):
+    """
+    마지막 집계 이후의 UsageHistory 를 batch_size 개씩 집계에 더하고, 반영한 기록 수를 반환합니다.
+
+    집계 상태 행을 잠근 트랜잭션 안에서 집계 테이블과 진행 위치(last_history_id)를 함께 갱신하므로
+    동시에 여러 번 실행되거나 중간에 실패해도 같은 기록이 두 번 더해지지 않습니다.
+    """
+    batch_size = batch_size or settings.USAGE_ROLLUP_BATCH
+    width = settings.USAGE_DURATION_BUCKET
+    cutoff = timezone.now() - timedelta(seconds=settings.USAGE_ROLLUP_LAG)
+    total = 0
+    while True:
+        with transaction.atomic():
+            state, _ = UsageRollupState.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+            rows = list(
+                UsageHistory.objects.filter(id__gt=state.last_history_id, recorded_at__lte=cutoff)
+                .order_by('id')[:batch_size]
+            )
+            if not rows:
+                break
+
+            occupancy, sessions, durations = Counter(), Counter(), Counter()
+            for history in rows:
+                interval = history.occupied
+                if interval is None:
+                    continue
+                start, end = interval
+                local_start = timezone.localtime(start)
+                sessions[(history.machine_id, local_start.weekday(), local_start.hour)] += 1
+                for weekday, hour, seconds in hour_bins(start, end):
+                    occupancy[(history.machine_id, weekday, hour)] += seconds
+                minutes = int((end - start).total_seconds() // 60)
+                durations[(history.machine_id, minutes // width * width)] += 1
+                state.since = min(state.since, start) if state.since else start
+
+            _add_bins(occupancy, sessions)
+            _add_buckets(durations)
+            state.last_history_id = rows[-1].id
+            state.save()
+
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+    return total
+
+
+def sample_queue_lengths(now=None):
+    """현재 동/기기 종류별 대기 인원(기기별 + 통합 대기열)을 해당 요일/시간대 표본으로 더합니다."""
+    local = timezone.localtime(now or timezone.now())
+    counts = Counter({
+        pair: 0 for pair in Machine.objects.values_list('building_id', 'machine_type').distinct()
+    })
+    machine_waits = (
+        WaitList.objects.filter(machine__isnull=False).order_by()
+        .values('machine__building_id', 'machine__machine_type').annotate(n=Count('id'))
+        .values_list('machine__building_id', 'machine__machine_type', 'n')
+    )
+    pool_waits = (
+        WaitList.objects.filter(machine__isnull=True).order_by()
+        .values('building_id', 'machine_type').annotate(n=Count('id'))
+        .values_list('building_id', 'machine_type', 'n')
+    )
+    for building_id, machine_type, n in [*machine_waits, *pool_waits]:
+        counts[(building_id, machine_type)] += n
+
+    with transaction.atomic():
+        existing = {
+            (row.building_id, row.machine_type): row
+            for row in QueueLengthRollup.objects.select_for_update().filter(
+                weekday=local.weekday(), hour=local.hour
+            )
+        }
+        created, updated = [], []
+        for (building_id, machine_type), waiters in counts.items():
+            row = existing.get((building_id, machine_type))
+            if row is None:
+                row = QueueLengthRollup(
+                    building_id=building_id, machine_type=machine_type, weekday=local.weekday(), hour=local.hour
+                )
+                created.append(row)
+            else:
+                updated.append(row)
+            row.samples += 1
+            row.waiters += waiters
+        QueueLengthRollup.objects.bulk_update(updated, ['samples', 'waiters'], batch_size=1000)
+        QueueLengthRollup.objects.bulk_create(created, batch_size=1000)
+
+
+def median_minutes(histogram):
+    """{버킷 시작(분): 횟수} 분포의 중앙값(분). 버킷 가운데 값으로 근사하며, 비어 있으면 None"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    seen = 0
+    for minutes in sorted(histogram):
+        seen += histogram[minutes]
+        if seen * 2 >= total:
+            return minutes + settings.USAGE_DURATION_BUCKET / 2
+
+
+def duration_histograms(building_ids):
+    """{machine_id: {버킷 시작(분): 횟수}} — 동에 속한 기기들의 사용 시간 분포"""
+    histograms = defaultdict(dict)
+    for machine_id, minutes, count in MachineDurationBucket.objects.filter(
+        machine__building_id__in=building_ids
+    ).values_list('machine_id', 'minutes', 'count'):
+        histograms[machine_id][minutes] = count
+    return histograms
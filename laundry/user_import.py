@@ -0,0 +1,204 @@
+# laundry/user_import.py
+"""
+학기 초 기숙사생 일괄 등록 (import_users 관리 명령, api/users/import/).
+
+CSV(헤더 포함) 또는 JSONL 을 한 줄씩 읽어 batch_size 명씩 처리합니다.
+- 평문 비밀번호(password)는 프로세스 풀에서 나눠 해시하고, 이미 해시된 값(password_hash)은 그대로 쓰며,
+  둘 다 없으면 사용할 수 없는 비밀번호로 만들어 해시 비용이 들지 않습니다.
+- User 와 Profile 은 bulk_create 로 넣으므로 create_user_profile 시그널을 거치지 않습니다.
+- 학번이 이미 있는 행은 건너뛰고(existing), 배치마다 진행 상황을 돌려주므로 중간에 실패해도 다시 실행하면
+  남은 행만 들어갑니다.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+
+from .models import Profile, User
+from .seeding import batched, insert_batch
+
+FIELDS = ('student_id', 'username', 'email', 'department', 'password', 'password_hash')
+MAX_ERRORS = 100
+# 파일 자체를 더 읽을 수 없는 오류 (UTF-8 이 아닌 인코딩, 깨진 CSV 등). 그 앞 배치까지만 반영됩니다.
+READ_ERRORS = (UnicodeDecodeError, csv.Error)
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.existing = 0
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'existing': self.existing,
+            'failed': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def read_rows(stream, fmt):
+    """텍스트 스트림에서 (줄 번호, dict) 를 하나씩 읽습니다. fmt 는 'csv' 또는 'jsonl'"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = exc
+            yield line_no, row
+    else:
+        raise ValueError(f'지원하지 않는 형식입니다: {fmt}')
+
+
+def text_stream(binary):
+    """업로드 파일 같은 바이너리 스트림을 UTF-8(BOM 허용) 텍스트로 읽습니다."""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def _clean(row, default_department):
+    """행을 검사해 User 필드 dict 로 바꿉니다. 잘못된 행이면 ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError('JSON 객체가 아닙니다.')
+    row = {key: (str(row.get(key) or '')).strip() for key in FIELDS}
+    if not row['student_id']:
+        raise ValueError('student_id 가 없습니다.')
+    # 회원가입과 같이 username 이 없으면 이메일, 그것도 없으면 학번을 씀 (대체한 값도 길이를 검사)
+    row['username'] = row['username'] or row['email'] or row['student_id']
+    for key in ('student_id', 'username', 'email'):
+        limit = User._meta.get_field(key).max_length
+        if len(row[key]) > limit:
+            raise ValueError(f'{key} 는 {limit}자 이하여야 합니다.')
+    if len(row['department']) > Profile._meta.get_field('department').max_length:
+        raise ValueError('department 가 너무 깁니다.')
+    if row['password_hash']:
+        try:
+            identify_hasher(row['password_hash'])
+        except ValueError:
+            raise ValueError('password_hash 형식을 알 수 없습니다.')
+    return {
+        'student_id': row['student_id'],
+        'username': row['username'],
+        'email': row['email'] or None,
+        'department': row['department'] or default_department,
+        'password': row['password'],
+        'password_hash': row['password_hash'],
+    }
+
+
+def _hash_pool(workers):
+    """
+    비밀번호 해시용 프로세스 풀.
+    fork 하면 부모의 DB 연결 소켓을 자식이 물려받아 종료 시 함께 닫을 수 있으므로 spawn 으로 띄웁니다.
+    자식은 환경 변수(DJANGO_SETTINGS_MODULE)를 물려받아 설정만 읽고 해시만 합니다.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    )
+
+
+class _Hasher:
+    """평문 비밀번호가 처음 나올 때 프로세스 풀을 띄우고, workers 가 1 이면 이 프로세스에서 해시합니다."""
+
+    def __init__(self, workers):
+        self.workers = workers or settings.USER_IMPORT_WORKERS or os.cpu_count()
+        self.pool = None
+
+    def __call__(self, rows):
+        plain = [row['password'] for row in rows if row['password'] and not row['password_hash']]
+        if plain and self.workers > 1:
+            if self.pool is None:
+                self.pool = _hash_pool(self.workers)
+            hashed = iter(self.pool.map(make_password, plain, chunksize=16))
+        else:
+            hashed = iter([make_password(password) for password in plain])
+        unusable = make_password(None)
+        result = []
+        for row in rows:
+            if row['password_hash']:
+                result.append(row['password_hash'])
+            elif row['password']:
+                result.append(next(hashed))
+            else:
+                result.append(unusable)
+        return result
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def import_users(rows, batch_size=None, workers=None, default_department=''):
+    """
+    read_rows() 의 (줄 번호, dict) 들을 batch_size 명씩 넣고, 배치마다 누적 ImportStats 를 내보냅니다.
+    평문 비밀번호는 workers 개 프로세스에서 나눠 해시합니다. (기본 USER_IMPORT_WORKERS, 없으면 CPU 수)
+    """
+    batch_size = batch_size or settings.USER_IMPORT_BATCH
+    stats = ImportStats()
+    hasher = _Hasher(workers)
+    try:
+        for batch in batched(rows, batch_size):
+            yield _import_batch(batch, stats, hasher, default_department)
+    finally:
+        hasher.close()
+
+
+def _import_batch(batch, stats, hasher, default_department):
+    stats.rows += len(batch)
+    valid, seen = [], set()
+    for line, row in batch:
+        try:
+            cleaned = _clean(row, default_department)
+        except ValueError as exc:
+            stats.error(line, str(exc))
+            continue
+        if cleaned['student_id'] in seen:
+            stats.error(line, '같은 파일에 학번이 중복되었습니다.')
+            continue
+        seen.add(cleaned['student_id'])
+        valid.append((line, cleaned))
+
+    # 다시 돌린 가져오기에서 이미 있는 학번의 비밀번호까지 해시하지 않도록 먼저 걸러냄
+    # (그 사이 다른 곳에서 생긴 학번은 insert_batch 가 한 번 더 걸러 existing 으로 셈)
+    known = set(User.objects.filter(
+        student_id__in=[row['student_id'] for _, row in valid]
+    ).values_list('student_id', flat=True))
+    new = [(line, row) for line, row in valid if row['student_id'] not in known]
+    stats.existing += len(valid) - len(new)
+
+    passwords = hasher([row for _, row in new])
+    ids, created, existing = insert_batch([
+        (
+            User(student_id=row['student_id'], username=row['username'], email=row['email'], password=password),
+            row['department'],
+        )
+        for (_, row), password in zip(new, passwords)
+    ])
+    stats.created += created
+    stats.existing += existing
+    for line, row in new:
+        if row['student_id'] not in ids:
+            stats.error(line, 'username 이 다른 사용자와 겹칩니다.')
+    return stats
@@ -2,30 +2,45 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.handlers.asgi import ASGIRequest
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.conf import settings
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 
 from datetime import timedelta
 from dateutil import parser  # 추가
 from django.utils import timezone
 
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 
 from .models import Building, Machine, Reservation, WaitList
-from .task import send_reservation_reminder, start_reservation_task, end_reservation_task
+from . import analytics, booking, profiling, promotion, slots, user_import, waitlist
 from .forms import SignUpForm
+from .serializers import BuildingCountSerializer
+from .db_router import replica_reads
+from .machine_cache import get_machine_states, machine_state_version
+from .state import machine_state_changed, machine_state_delta
+from .task import promote_and_notify
+from .events import broker
+from asgiref.sync import sync_to_async
+import asyncio
+import hashlib
+import logging
 import os
 import json
 import datetime
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 # ── 회원가입 및 인증 ──
 
@@ -68,52 +83,88 @@ def activate_view(request, uidb64, token):
     else:
         return render(request, 'laundry/activation_invalid.html')
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def revoke_token_api(request):
+    """
+    API 토큰을 폐기합니다. (기기 분실, 로그아웃) 관리자는 user_id 로 다른 사용자의 토큰을 폐기할 수 있습니다.
+    새 토큰은 login/api/ 로 다시 발급받습니다.
+    """
+    user_id = request.data.get('user_id')
+    if user_id and not request.user.is_staff:
+        return Response({'message': '다른 사용자의 토큰은 관리자만 폐기할 수 있습니다.'}, status=403)
+    deleted, _ = Token.objects.filter(user_id=user_id or request.user.id).delete()
+    return Response({'revoked': bool(deleted)})
+
 # ── 페이지 뷰 ──
 
 def index_page(request):
     return render(request, 'index.html')
 
+def machine_page_context(building_id=None, machine_type=None):
+    """
+    기기 목록 페이지 공통 context. 목록은 템플릿 조각 캐시
+    (동, 종류, 기기 상태 버전 기준)에 없을 때만 읽습니다.
+    """
+    return {
+        'machines': SimpleLazyObject(lambda: get_machine_states(building_id, machine_type)),
+        'building_id': building_id,
+        'type': machine_type,
+        'state_version': machine_state_version(building_id),
+        'fragment_ttl': settings.MACHINE_CACHE_TTL,
+    }
+
 @login_required
+@replica_reads
 def machine_list_page(request):
-    machines = Machine.objects.all()
-    type_ = request.GET.get('type')
-    building = request.GET.get('building')
-    if type_:
-        machines = machines.filter(machine_type=type_)
-    if building:
-        machines = machines.filter(building=building)
-    return render(request, 'laundry/machine_list.html', {'machines': machines})
+    context = machine_page_context(request.GET.get('building'), request.GET.get('type'))
+    return render(request, 'laundry/machine_list.html', context)
 
 @login_required
+@replica_reads
 def washer_list(request):
-    machines = Machine.objects.filter(machine_type='washer')
-    return render(request, 'laundry/machine_list.html', {'machines': machines})
+    return render(request, 'laundry/machine_list.html', machine_page_context(machine_type='washer'))
 
 @login_required
+@replica_reads
 def dryer_list(request):
-    machines = Machine.objects.filter(machine_type='dryer')
-    return render(request, 'laundry/machine_list.html', {'machines': machines})
+    return render(request, 'laundry/machine_list.html', machine_page_context(machine_type='dryer'))
 
 @login_required
 def mypage(request):
-    reservations = Reservation.objects.filter(user=request.user).order_by('-start_time')
-    waitlist = WaitList.objects.filter(user=request.user).order_by('-created_at')
+    reservations = (
+        Reservation.objects.filter(user=request.user)
+        .select_related('machine__building')
+        .order_by('-start_time')
+    )
+    waits = list(
+        WaitList.objects.filter(user=request.user)
+        .select_related('machine__building', 'building')
+        .order_by('-created_at')
+    )
+    statuses = waitlist.statuses(waits)
+    for wait in waits:
+        wait.queue_status = statuses[wait.id]
     return render(request, 'laundry/mypage.html', {
         'reservations': reservations,
-        'waitlist': waitlist
+        'waitlist': waits
     })
 
 @login_required
+@replica_reads
 def select_building_page(request):
     type_ = request.GET.get('type', 'washer')
-    building_ids = Machine.objects.values_list('building_id', flat=True).distinct()
-    building_qs = Building.objects.filter(id__in=building_ids).order_by('name')
+    # QuerySet 은 템플릿에서 처음 순회할 때 실행되므로 조각 캐시에 있으면 쿼리하지 않음
+    building_qs = building_summary_queryset().filter(total_count__gt=0)
     return render(request, 'laundry/select_building.html', {
         'buildings': building_qs,
         'type': type_,
+        'state_version': machine_state_version(),
+        'fragment_ttl': settings.MACHINE_CACHE_TTL,
     })
 
 @login_required
+@replica_reads
 def select_machine(request):
     type_ = request.GET.get("type")
     building_id = request.GET.get("building")
@@ -125,58 +176,130 @@ def select_machine(request):
 
     building_obj = get_object_or_404(Building, id=building_id)
 
-    machines = Machine.objects.filter(
-        machine_type=type_,
-        building__id=building_id
-    ).order_by('name')
-
     return render(request, 'laundry/select_machine.html', {
-        'machines': machines,
+        **machine_page_context(building_obj.id, type_),
         'building_name': building_obj.name.upper(),
-        'type': type_,
+        # WSGI 로 서비스 중이면 SSE 대신 상태 버전 폴링(?since=)으로 갱신
+        'live_events': isinstance(request, ASGIRequest),
     })
 
+def building_summary_queryset():
+    return Building.objects.with_machine_counts().order_by('name')
+
 @login_required
+@replica_reads
 def building_list_with_counts(request):
-    buildings = Machine.objects.values_list('building_id', flat=True).distinct()
-    data = []
-    for b in buildings:
-        count = Machine.objects.filter(building_id=b, is_in_use=True).count()
-        data.append({'building': b, 'count': count})
-    return JsonResponse(data, safe=False)
+    """동별 기기 수 집계. ?type=washer|dryer 를 주면 해당 종류의 이용 분석 요약을 함께 돌려줍니다."""
+    buildings = list(building_summary_queryset())
+    context = {}
+    machine_type = request.GET.get('type')
+    if machine_type in dict(Machine.MACHINE_TYPES):
+        context['analytics'] = analytics.building_analytics([b.id for b in buildings], machine_type)
+    serializer = BuildingCountSerializer(buildings, many=True, context=context)
+    return JsonResponse(serializer.data, safe=False)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def building_analytics_api(request, building_id):
+    """동/기기 종류별 7x24 점유율, 평균 대기 인원, 추천 방문 시각 (?type=washer|dryer)"""
+    building = get_object_or_404(Building, pk=building_id)
+    machine_type = request.GET.get('type', 'washer')
+    if machine_type not in dict(Machine.MACHINE_TYPES):
+        return Response({'error': 'type 은 washer 또는 dryer 여야 합니다.'}, status=400)
+    return Response(analytics.building_analytics([building.id], machine_type)[building.id])
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def building_slots_api(request, building_id):
+    """
+    동/기기 종류별 하루 예약 슬롯 그리드 (?type=washer|dryer&date=YYYY-MM-DD&encoding=rle|bitmap)
+    가용성 인덱스를 새로 읽어야 하므로 복제본으로 보내지 않습니다.
+    """
+    building = get_object_or_404(Building, pk=building_id)
+    machine_type = request.GET.get('type', 'washer')
+    if machine_type not in dict(Machine.MACHINE_TYPES):
+        return Response({'error': 'type 은 washer 또는 dryer 여야 합니다.'}, status=400)
+    encoding = request.GET.get('encoding', 'rle')
+    if encoding not in slots.ENCODINGS:
+        return Response({'error': 'encoding 은 rle 또는 bitmap 이어야 합니다.'}, status=400)
+    try:
+        day = datetime.date.fromisoformat(request.GET['date']) if request.GET.get('date') else timezone.localdate()
+    except ValueError:
+        return Response({'error': 'date 는 YYYY-MM-DD 형식이어야 합니다.'}, status=400)
+    first_day, last_day = slots.bookable_days(timezone.localdate())
+    if not first_day <= day <= last_day:
+        return Response({'error': f'date 는 {first_day}~{last_day} 사이여야 합니다.'}, status=400)
+    return Response(slots.building_slot_grid(building.id, machine_type, day, encoding))
+
+# ── 실시간 상태 스트림 (ASGI) ──
+
+@login_required
+async def machine_event_stream(request, building_id):
+    """
+    동별 기기 상태 변경을 Server-Sent Events 로 전달합니다.
+    연결 직후 현재 상태 전체(snapshot)를 보내고, 이후에는 바뀐 기기만 보냅니다.
+    ASGI 서버(uvicorn)에서만 동작합니다. WSGI(runserver 등)는 스트리밍 응답을 끝까지 모아 보내므로
+    연결마다 워커를 붙잡고 이벤트도 전달되지 않아 501 을 돌려주며, 화면은 ?since= 폴링을 씁니다.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'message': '실시간 이벤트는 ASGI 서버에서만 지원합니다.'}, status=501)
+
+    async def stream():
+        entry = broker.subscribe(building_id)
+        queue = entry[1]
+        try:
+            snapshot = await sync_to_async(get_machine_states)(building_id)
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.MACHINE_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # 프록시가 유휴 연결을 끊지 않도록 주석 라인 전송
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            broker.unsubscribe(building_id, entry)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 # ── API 뷰 ──
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_machine_list_api(request):
-    machines = Machine.objects.all()
-    machine_type = request.GET.get('type')
-    building = request.GET.get('building')
-    if machine_type:
-        machines = machines.filter(machine_type=machine_type)
-    if building:
-        machines = machines.filter(building=building)
-    data = [
-        {
-            'id': m.id,
-            'name': m.name,
-            'machine_type': m.machine_type,
-            'building': m.building,
-            'is_in_use': m.is_in_use
-        }
-        for m in machines
-    ]
-    return Response(data)
+    """
+    기기 상태 목록. ?building=<id>&since=<version> 을 주면 그 버전 이후 상태가 바뀐 기기만
+    {'building_id', 'version', 'full', 'machines'} 로 돌려주고, 버전이 너무 오래되었으면 전체 목록(full=true)을 줍니다.
+    처음에는 since=0 으로 전체 목록과 버전을 받고, 이후 응답의 version 을 다음 since 로 씁니다.
+    """
+    since = request.GET.get('since')
+    if since is None:
+        machines = get_machine_states(request.GET.get('building'), request.GET.get('type'))
+        return Response(machines)
+    try:
+        since = int(since)
+        building = Building.objects.get(pk=int(request.GET.get('building', '')))
+    except ValueError:
+        return Response({'message': 'since 와 building 은 숫자여야 합니다.'}, status=400)
+    except Building.DoesNotExist:
+        return Response({'message': '동을 찾을 수 없습니다.'}, status=404)
+    return Response(machine_state_delta(building, since, request.GET.get('type')))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_remaining_time_api(request):
     machine_id = request.GET.get('machine_id')
     try:
         machine = Machine.objects.get(pk=machine_id)
         now = timezone.now()
-        active = Reservation.objects.filter(
+        active = Reservation.objects.live().filter(
             machine=machine,
             start_time__lte=now,
             end_time__gt=now
@@ -186,7 +309,39 @@ def get_remaining_time_api(request):
     except Machine.DoesNotExist:
         return Response({'minutes': None}, status=status.HTTP_404_NOT_FOUND)
 
-import json
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def get_remaining_times_api(request):
+    """
+    동(building, 선택적으로 type) 또는 기기 id 목록(ids=1,2,3)에 대해 남은 시간, 현재 예약 종료 시각,
+    대기 인원을 한 번의 쿼리로 돌려줍니다. 내용이 바뀌지 않았으면 If-None-Match 에 304로 응답합니다.
+    """
+    machines = Machine.objects.order_by('id')
+    if request.GET.get('ids'):
+        try:
+            ids = [int(i) for i in request.GET['ids'].split(',') if i]
+        except ValueError:
+            return Response({'message': 'ids 는 쉼표로 구분한 숫자여야 합니다.'}, status=400)
+        machines = machines.filter(pk__in=ids)
+    elif request.GET.get('building'):
+        try:
+            building_id = int(request.GET['building'])
+        except ValueError:
+            return Response({'message': 'building 은 숫자여야 합니다.'}, status=400)
+        machines = machines.filter(building_id=building_id)
+        if request.GET.get('type'):
+            machines = machines.filter(machine_type=request.GET['type'])
+    else:
+        return Response({'message': 'building 또는 ids 가 필요합니다.'}, status=400)
+
+    now = timezone.now()
+    data = [m.live_state(now) for m in machines.with_live_state(now)]
+
+    etag = '"%s"' % hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    return Response(data, headers={'ETag': etag})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -196,58 +351,82 @@ def create_reservation(request):
 
         # ✅ request.data만 사용
         machine_id = request.data.get('machine_id')
-        start_str = request.data.get('start_time')
-        end_str = request.data.get('end_time')
-
-        print("DEBUG:", machine_id, start_str, end_str)
-
-        if not (machine_id and start_str and end_str):
-            return Response({'success': False, 'message': '필수 데이터 누락'}, status=400)
-
-        start = parser.isoparse(start_str)
-        end = parser.isoparse(end_str)
-
-        kst = timezone.get_current_timezone()
-        start = start.astimezone(kst)
-        end = end.astimezone(kst)
-        now = timezone.localtime()  # 이미 KST
-
-
-        print("📌 서버 기준 현재 시각 (now):", now.isoformat())
-        print("📌 예약 요청 시작 시각 (start):", start.isoformat())
-
-        if start < now:
-            return Response({'success': False, 'message': '예약 시작 시간이 현재보다 이전입니다.'}, status=400)
-
-        machine = get_object_or_404(Machine, pk=machine_id)
-
-        if Reservation.objects.filter(machine=machine, end_time__gt=timezone.now()).exists():
-            return Response({'success': False, 'message': '이미 사용 중인 기기입니다.'}, status=400)
-
-        new_res = Reservation.objects.create(
-            user=user,
-            machine=machine,
-            start_time=start,
-            end_time=end
-        )
-
-        machine.is_in_use = True
-        machine.save()
-
-        start_reservation_task.apply_async(args=[new_res.id], eta=start)
-        end_reservation_task.apply_async(args=[new_res.id], eta=end)
-
-        for label, offset in [('10분 전', timedelta(minutes=10)), ('시작 시각', timedelta())]:
-            eta = start - offset
-            if timezone.is_naive(eta):
-                eta = timezone.make_aware(eta, timezone.get_current_timezone())
-            send_reservation_reminder.apply_async(args=[new_res.id, label], eta=eta)
-
-        return Response({'success': True, 'message': '예약이 생성되었습니다.'})
+        slot_id = request.data.get('slot')
+
+        if slot_id is not None:
+            # 슬롯 그리드에서 고른 예약: 정수 슬롯 id 로 시각을 바로 계산
+            if not machine_id:
+                return Response({'success': False, 'message': '필수 데이터 누락'}, status=400)
+            try:
+                slot_id = int(slot_id)
+                slot_count = int(request.data.get('slots') or settings.BOOKING_DEFAULT_SLOTS)
+            except (TypeError, ValueError):
+                return Response({'success': False, 'message': '슬롯 id 와 슬롯 수는 정수여야 합니다.'}, status=400)
+            try:
+                start, end = slots.slot_booking_window(slot_id, slot_count, timezone.now())
+            except ValueError as e:
+                return Response({'success': False, 'message': str(e)}, status=400)
+        else:
+            start_str = request.data.get('start_time')
+            end_str = request.data.get('end_time')
+
+            if not (machine_id and start_str and end_str):
+                return Response({'success': False, 'message': '필수 데이터 누락'}, status=400)
+
+            kst = timezone.get_current_timezone()
+            try:
+                start = parser.isoparse(start_str).astimezone(kst)
+                end = parser.isoparse(end_str).astimezone(kst)
+            except (ValueError, OverflowError):
+                return Response({'success': False, 'message': '시간은 ISO 8601 형식이어야 합니다.'}, status=400)
+            now = timezone.localtime()  # 이미 KST
+
+            if start < now:
+                return Response({'success': False, 'message': '예약 시작 시간이 현재보다 이전입니다.'}, status=400)
+
+            if end <= start:
+                return Response({'success': False, 'message': '종료 시간은 시작 시간 이후여야 합니다.'}, status=400)
+
+            if end > now + settings.BOOKING_HORIZON:
+                return Response({
+                    'success': False, 'message': f'{settings.BOOKING_HORIZON.days}일 이후는 예약할 수 없습니다.',
+                }, status=400)
+
+            # 슬롯 예약과 같은 최대 길이 (한없이 긴 예약이 기기를 계속 막지 않도록)
+            max_minutes = settings.BOOKING_MAX_SLOTS * settings.SLOT_MINUTES
+            if end - start > timedelta(minutes=max_minutes):
+                return Response({'success': False, 'message': f'예약은 최대 {max_minutes}분까지 가능합니다.'}, status=400)
+
+        idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+        if idempotency_key and len(idempotency_key) > 64:
+            return Response({'success': False, 'message': 'Idempotency-Key 는 64자 이하여야 합니다.'}, status=400)
+
+        try:
+            reservation, created = booking.create_reservation(user, machine_id, start, end, idempotency_key)
+        except Machine.DoesNotExist:
+            return Response({'success': False, 'message': '존재하지 않는 기기입니다.'}, status=404)
+        except booking.ReservationConflict as e:
+            return Response({
+                'success': False,
+                'message': str(e),
+                'next_available': timezone.localtime(e.next_available).isoformat(),
+                'next_slot': slots.slot_at_or_after(e.next_available),
+            }, status=400)
+        except booking.IdempotencyKeyReused as e:
+            return Response({
+                'success': False,
+                'message': str(e),
+                'reservation_id': e.reservation.id,
+            }, status=409)
+
+        return Response({
+            'success': True,
+            'message': '예약이 생성되었습니다.' if created else '이미 처리된 예약 요청입니다.',
+            'reservation_id': reservation.id,
+        })
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("create_reservation failed")
         return Response({'success': False, 'message': f'서버 오류: {str(e)}'}, status=500)
 
 
@@ -255,25 +434,119 @@ def create_reservation(request):
 @permission_classes([IsAuthenticated])
 def cancel_reservation(request, pk=None):
     reservation = get_object_or_404(Reservation, pk=pk if pk else request.data.get('reservation_id'))
-    machine = reservation.machine
-    reservation.delete()
-    machine.is_in_use = False
-    machine.save()
+    closed = booking.close_reservation(reservation.id, Reservation.CANCELLED)
+    if not closed:
+        return Response({'message': '이미 종료되었거나 취소된 예약입니다.'}, status=400)
+    # 승격 제안 거절, 사용 중 취소처럼 지금 기기가 비면 다음 대기자에게 바로 넘깁니다.
+    now = timezone.now()
+    if reservation.status in (Reservation.OFFERED, Reservation.ACTIVE) or closed.start_time <= now < closed.end_time:
+        promote_and_notify([closed.machine_id])
     return Response({'message': '예약이 취소되었습니다.'})
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def claim_reservation(request, pk):
+    """대기열에서 승격된 예약을 확인 기한 안에 사용 확정합니다."""
+    if not promotion.claim_offer(pk, request.user):
+        return Response({'success': False, 'message': '확인 기한이 지났거나 확인할 수 없는 예약입니다.'}, status=400)
+    return Response({'success': True, 'message': '예약이 확정되었습니다.'})
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def join_waitlist(request):
+    """
+    machine_id 를 주면 해당 기기 대기열에, building_id 와 type 을 주면
+    그 동의 같은 종류 기기 중 먼저 비는 기기의 대기열에 참여합니다.
+    """
     user = request.user
     machine_id = request.data.get('machine_id')
-    machine = get_object_or_404(Machine, pk=machine_id)
-    WaitList.objects.get_or_create(user=user, machine=machine)
-    return Response({'message': '대기열에 참여했습니다.'})
+    if machine_id:
+        machine = get_object_or_404(Machine, pk=machine_id)
+        wait, created = waitlist.join(user, machine=machine)
+        if created:
+            machine_state_changed(machine)
+    else:
+        building = get_object_or_404(Building, pk=request.data.get('building_id'))
+        machine_type = request.data.get('type')
+        if machine_type not in dict(Machine.MACHINE_TYPES):
+            return Response({'error': 'type 은 washer 또는 dryer 여야 합니다.'}, status=400)
+        wait, created = waitlist.join(user, building=building, machine_type=machine_type)
+        if created:
+            # 지금 비어 있는 기기가 있으면 바로 배정합니다.
+            idle = (
+                building.machines.with_occupancy()
+                .filter(machine_type=machine_type, occupied=False).values_list('id', flat=True)
+            )
+            promoted = promote_and_notify(list(idle))
+            offer = next((r for r in promoted if r.user_id == user.id), None)
+            if offer:
+                return Response({'message': '비어 있는 기기가 배정되었습니다.', 'reservation_id': offer.id})
+    return Response({'message': '대기열에 참여했습니다.', **waitlist.status(wait)})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def waitlist_status(request):
+    """내 대기 순번, 대기열 길이, 예상 대기 시간(분). (machine_id 또는 building_id + type)"""
+    machine_id = request.GET.get('machine_id')
+    if machine_id:
+        wait = get_object_or_404(WaitList.objects.select_related('machine'), user=request.user, machine_id=machine_id)
+    else:
+        wait = get_object_or_404(
+            WaitList, user=request.user, machine__isnull=True,
+            building_id=request.GET.get('building_id'), machine_type=request.GET.get('type', ''),
+        )
+    return Response(waitlist.status(wait))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_waitlist(request, machine_id):
     machine = get_object_or_404(Machine, pk=machine_id)
-    waiters = WaitList.objects.filter(machine=machine).order_by('created_at')
+    waiters = WaitList.objects.filter(machine=machine).select_related('user').order_by('created_at')
     data = [{'user': w.user.student_id, 'joined_at': w.created_at} for w in waiters]
-    return Response(data)
\ No newline at end of file
+    return Response(data)
+
+# ── 관리자 API ──
+
+def metrics_view(request):
+    """
+    프로파일링 누적값(Prometheus 텍스트 형식). PROFILING_METRICS_IPS 에서 오는 수집기나
+    관리자 로그인 사용자만 읽을 수 있습니다.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.PROFILING_METRICS_IPS and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(profiling.render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def import_users_api(request):
+    """
+    기숙사생 일괄 등록. multipart 'file' 로 CSV(헤더 포함) 또는 JSONL(?format=jsonl, 확장자로도 판단)을 받고,
+    배치마다 진행 상황을 한 줄씩(JSON Lines) 보내며 마지막 줄에 오류 목록을 붙입니다.
+    파일을 읽다 실패하면(인코딩, 깨진 CSV) 그 앞 배치까지 반영하고 마지막 줄에 error 를 담습니다.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'message': 'file 이 필요합니다.'}, status=400)
+    fmt = request.GET.get('format') or ('jsonl' if upload.name.endswith(('.jsonl', '.ndjson')) else 'csv')
+    if fmt not in ('csv', 'jsonl'):
+        return Response({'message': 'format 은 csv 또는 jsonl 이어야 합니다.'}, status=400)
+    department = request.data.get('department', '')
+
+    def progress():
+        stats, error = None, None
+        try:
+            for stats in user_import.import_users(
+                user_import.read_rows(user_import.text_stream(upload.file), fmt), default_department=department
+            ):
+                summary = stats.as_dict()
+                del summary['errors']
+                yield json.dumps(summary) + '\n'
+        except user_import.READ_ERRORS as exc:
+            # 이미 200 으로 스트리밍 중이므로 마지막 줄에 오류를 담아 중단 사실을 알림
+            error = f'파일을 읽을 수 없습니다 (UTF-8 CSV/JSONL 인지 확인하세요): {exc}'
+        result = stats.as_dict() if stats else user_import.ImportStats().as_dict()
+        if error:
+            result['error'] = error
+        yield json.dumps({**result, 'done': True}, ensure_ascii=False) + '\n'
+
+    return StreamingHttpResponse(progress(), content_type='application/x-ndjson')
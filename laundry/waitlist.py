@@ -0,0 +1,248 @@
+# laundry/waitlist.py
+"""
+대기열 순번/길이/예상 대기 시간 조회.
+
+WaitList 가 원본이고, WAITLIST_REDIS_URL 이 설정되어 있으면 대기열마다 Redis sorted set
+(점수: 대기 시작 시각)을 커밋 이후에 함께 갱신해 순번(ZRANK)과 길이(ZCARD)를 전체 대기열을
+읽지 않고 바로 구합니다. Redis 가 비어 있거나 어긋난 대기열은 DB 에서 다시 채우고,
+Redis 를 쓸 수 없으면 (대기열, created_at) 인덱스 범위 COUNT 로 같은 값을 계산합니다.
+
+미러 갱신은 커밋 이후에 실패할 수 있으므로(Redis 장애, 프로세스 종료) 대기열 키마다
+WAITLIST_MIRROR_TTL 을 두어, 빠진 삭제 때문에 어긋난 순번/길이도 그 시간 안에 DB 기준으로 다시 채워집니다.
+"""
+import logging
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import usage
+from .models import Machine, WaitList
+from .profiling import count_cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'laundry:waitlist:'
+
+_redis_client = None
+
+
+def _client():
+    global _redis_client
+    if not settings.WAITLIST_REDIS_URL:
+        return None
+    if _redis_client is None:
+        import redis
+
+        _redis_client = redis.Redis.from_url(settings.WAITLIST_REDIS_URL)
+    return _redis_client
+
+
+def queue_key(wait):
+    if wait.machine_id:
+        return f'{KEY_PREFIX}machine:{wait.machine_id}'
+    return f'{KEY_PREFIX}pool:{wait.building_id}:{wait.machine_type}'
+
+
+def queue_rows(wait):
+    """wait 와 같은 대기열에 속한 WaitList 행"""
+    if wait.machine_id:
+        return WaitList.objects.filter(machine_id=wait.machine_id)
+    return WaitList.objects.filter(
+        machine__isnull=True, building_id=wait.building_id, machine_type=wait.machine_type
+    )
+
+
+def join(user, machine=None, building=None, machine_type=''):
+    """
+    특정 기기(machine) 또는 동의 같은 종류 기기 전체(building + machine_type) 대기열에 참여합니다.
+    (wait, created) 를 반환합니다.
+    """
+    if machine is not None:
+        return WaitList.objects.get_or_create(user=user, machine=machine)
+    return WaitList.objects.get_or_create(
+        user=user, machine=None, building=building, machine_type=machine_type
+    )
+
+
+# ── Redis 미러 ──
+
+def _score(wait):
+    return wait.created_at.timestamp()
+
+
+# 키가 이미 있을 때만 추가: 만료/삭제된 대기열에 새 행 하나만 들어가 맨 앞 순번으로 보이지 않도록
+# (없는 대기열은 다음 조회 때 _rebuild 가 DB 에서 통째로 채움)
+_ADD_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+"""
+
+
+def mirror_add(wait):
+    client = _client()
+    if client:
+        client.eval(_ADD_IF_EXISTS, 1, queue_key(wait), _score(wait), wait.id, settings.WAITLIST_MIRROR_TTL)
+
+
+def mirror_remove(key, wait_id):
+    client = _client()
+    if client:
+        client.zrem(key, wait_id)
+
+
+def _rebuild(client, wait):
+    """DB 의 대기열로 sorted set 을 다시 채웁니다."""
+    key = queue_key(wait)
+    rows = queue_rows(wait).values_list('id', 'created_at')
+    pipe = client.pipeline()
+    pipe.delete(key)
+    if rows:
+        pipe.zadd(key, {wait_id: created_at.timestamp() for wait_id, created_at in rows})
+        pipe.expire(key, settings.WAITLIST_MIRROR_TTL)
+    pipe.execute()
+
+
+def _redis_positions(client, waits):
+    """{wait.id: (순번, 길이)}. 미러에 없는 대기열은 한 번 다시 채우고, 그래도 없으면 결과에서 뺍니다."""
+    result = {}
+    pending = list(waits)
+    for attempt in range(2):
+        pipe = client.pipeline(transaction=False)
+        for wait in pending:
+            pipe.zrank(queue_key(wait), wait.id)
+            pipe.zcard(queue_key(wait))
+        replies = pipe.execute()
+        missing = []
+        for i, wait in enumerate(pending):
+            rank, length = replies[2 * i], replies[2 * i + 1]
+            if rank is None:
+                missing.append(wait)
+            else:
+                result[wait.id] = (rank + 1, length)
+        if not missing or attempt:
+            break
+        for wait in {queue_key(w): w for w in missing}.values():
+            _rebuild(client, wait)
+        pending = missing
+    return result
+
+
+def positions(waits):
+    """{wait.id: (순번, 대기열 길이)}. 순번은 1부터 셉니다."""
+    waits = list(waits)
+    result = {}
+    client = _client()
+    if client:
+        try:
+            result = _redis_positions(client, waits)
+        except Exception as exc:
+            logger.warning("waitlist redis lookup failed, using database: %s", exc)
+    missing = [wait.id for wait in waits if wait.id not in result]
+    if missing:
+        for wait in WaitList.objects.with_position().filter(id__in=missing):
+            result[wait.id] = (wait.queue_ahead + 1, wait.queue_length)
+    return result
+
+
+# ── 예상 대기 시간 ──
+
+def _cycle_key(building_id):
+    return f'{KEY_PREFIX}cycle:{building_id}'
+
+
+def forget_cycles(building_id):
+    cache.delete(_cycle_key(building_id))
+
+
+def _building_cycles(building_ids):
+    """
+    동별 기기 사용 시간 중앙값(분)과 종류별 (기기 수, 사용 시간 중앙값).
+    사용 통계 집계(MachineDurationBucket)만 읽으며, 기록이 없는 기기는 PROMOTION_DURATION 으로 봅니다.
+    자주 바뀌지 않으므로 WAITLIST_CYCLE_TTL 동안 캐시하고, 캐시에 없는 동은 한 번에 계산합니다.
+    """
+    keys = {_cycle_key(building_id): building_id for building_id in building_ids}
+    found = cache.get_many(list(keys))
+    cycles = {keys[key]: value for key, value in found.items()}
+    missing = [building_id for building_id in building_ids if building_id not in cycles]
+    count_cache(hits=len(cycles), misses=len(missing))
+    if not missing:
+        return cycles
+
+    default = settings.PROMOTION_DURATION.total_seconds() / 60
+    histograms = usage.duration_histograms(missing)
+    fresh = {building_id: {'machines': {}, 'pools': {}} for building_id in missing}
+    pools = defaultdict(lambda: {'count': 0, 'histogram': Counter()})
+    for machine_id, building_id, machine_type in Machine.objects.filter(
+        building_id__in=missing
+    ).values_list('id', 'building_id', 'machine_type'):
+        histogram = histograms.get(machine_id, {})
+        fresh[building_id]['machines'][machine_id] = usage.median_minutes(histogram) or default
+        pool = pools[(building_id, machine_type)]
+        pool['count'] += 1
+        pool['histogram'].update(histogram)
+    for (building_id, machine_type), pool in pools.items():
+        fresh[building_id]['pools'][machine_type] = (
+            pool['count'], usage.median_minutes(pool['histogram']) or default
+        )
+    cache.set_many({_cycle_key(building_id): cycle for building_id, cycle in fresh.items()}, settings.WAITLIST_CYCLE_TTL)
+    cycles.update(fresh)
+    return cycles
+
+
+def _servers(wait, cycles):
+    """대기열을 처리하는 기기 수와 평균 사용 시간(분)"""
+    default = settings.PROMOTION_DURATION.total_seconds() / 60
+    if wait.machine_id:
+        cycle = cycles.get(wait.machine.building_id, {})
+        return 1, cycle.get('machines', {}).get(wait.machine_id, default)
+    cycle = cycles.get(wait.building_id, {})
+    return cycle.get('pools', {}).get(wait.machine_type, (1, default))
+
+
+def statuses(waits):
+    """
+    {wait.id: {'position', 'length', 'estimated_wait_minutes'}}
+    machine 을 함께 읽어 둔 (select_related) WaitList 를 넘기면 추가 쿼리 없이 계산합니다.
+    """
+    waits = list(waits)
+    if not waits:
+        return {}
+    ranks = positions(waits)
+    cycles = _building_cycles({
+        wait.machine.building_id if wait.machine_id else wait.building_id for wait in waits
+    })
+    result = {}
+    for wait in waits:
+        rank, length = ranks[wait.id]
+        servers, cycle_minutes = _servers(wait, cycles)
+        result[wait.id] = {
+            'position': rank,
+            'length': length,
+            'estimated_wait_minutes': math.ceil(rank / servers) * round(cycle_minutes),
+        }
+    return result
+
+
+def status(wait):
+    """대기 순번, 대기열 길이, 예상 대기 시간(분)"""
+    return statuses([wait])[wait.id]
+
+
+def _on_commit(func, *args):
+    # 미러 갱신 실패(Redis 장애 등)가 대기열 처리를 막지 않도록 robust=True
+    # 어긋난 대기열은 다음 순번 조회 때 DB 에서 다시 채워집니다.
+    transaction.on_commit(lambda: func(*args), robust=True)
+
+
+def schedule_mirror_add(wait):
+    _on_commit(mirror_add, wait)
+
+
+def schedule_mirror_remove(wait):
+    # 삭제 후에는 id 가 None 이 되므로 지금 값으로 고정합니다.
+    _on_commit(mirror_remove, queue_key(wait), wait.id)